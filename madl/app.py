@@ -1,16 +1,29 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from madl.autocomplete import autocomplete
+from madl.compression import CompressionMiddleware
+from madl.database import engine, settings
+from madl.hashing import password_hasher
+from madl.pool_metrics import pool_metrics
+from madl.result_cache import result_cache
 from madl.routers import (
     accounts_router,
     auth_router,
+    autocomplete_router,
     books_router,
     novelists_router,
+    search_router,
 )
+from madl.schemas.cache_schema import ResultCacheStatsSchema
+from madl.schemas.hashing_schema import HashingStatsSchema
 from madl.schemas.message_schema import MessageSchema
+from madl.schemas.pool_schema import PoolStatsSchema
 
 tags_metadata = [
     {
@@ -25,18 +38,42 @@ tags_metadata = [
         'name': 'Books',
         'description': 'Manage and add novelist books.',
     },
+    {
+        'name': 'Search',
+        'description': (
+            'Full-text search and autocomplete over Books and Novelists.'
+        ),
+    },
     {
         'name': 'Auth',
         'description': "Manage all user's security.",
     },
 ]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.AUTOCOMPLETE_PRELOAD:
+        async with AsyncSession(engine) as session:
+            await autocomplete.build(session)
+    yield
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title='MADR',
+    lifespan=lifespan,
     openapi_tags=tags_metadata,
+    default_response_class=ORJSONResponse,
     swagger_ui_parameters={'defaultModelsExpandDepth': 0},
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    thread_size=settings.COMPRESSION_THREAD_SIZE,
+)
+
 
 @app.exception_handler(StarletteHTTPException)
 async def custom_http_exception_handler(request: Request, exc: HTTPException):
@@ -48,12 +85,15 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={'detail': exc.detail},
+        headers=getattr(exc, 'headers', None),
     )
 
 
 app.include_router(accounts_router.router)
 app.include_router(novelists_router.router)
 app.include_router(books_router.router)
+app.include_router(search_router.router)
+app.include_router(autocomplete_router.router)
 app.include_router(auth_router.router)
 
 
@@ -65,3 +105,44 @@ app.include_router(auth_router.router)
 )
 def read_root():
     return {'message': 'MADR Online!'}
+
+
+def require_internal_metrics():
+    # Desligadas, as rotas internas respondem como se não existissem
+    if not settings.INTERNAL_METRICS_ENABLED:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Not Found'
+        )
+
+
+@app.get(
+    '/internal/pool',
+    status_code=HTTPStatus.OK,
+    response_model=PoolStatsSchema,
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_metrics)],
+)
+def read_pool_stats():
+    return pool_metrics.snapshot(engine)
+
+
+@app.get(
+    '/internal/hashing',
+    status_code=HTTPStatus.OK,
+    response_model=HashingStatsSchema,
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_metrics)],
+)
+def read_hashing_stats():
+    return password_hasher.snapshot()
+
+
+@app.get(
+    '/internal/cache',
+    status_code=HTTPStatus.OK,
+    response_model=ResultCacheStatsSchema,
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_metrics)],
+)
+def read_cache_stats():
+    return result_cache.stats()
@@ -0,0 +1,149 @@
+import unicodedata
+from bisect import bisect_left, insort
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.models import Book, Novelist
+
+
+class PrefixIndex:
+    # Lista ordenada de (chave, id) consultada por busca binária. Cada palavra
+    # do nome gera uma chave, então 'assis' encontra 'machado de assis'.
+    def __init__(self):
+        self._entries: list[tuple[str, int]] = []
+        self._labels: dict[int, str] = {}
+        # Grupo opcional de cada item, como o romancista de um livro, para
+        # remover todos de uma vez sem consultar o banco
+        self._groups: dict[int, int] = {}
+        self._members: dict[int, set[int]] = {}
+        self.stale = False
+
+    def __len__(self):
+        return len(self._labels)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # A decomposição vem antes de tudo para que textos já em NFD tenham
+        # o mesmo resultado; acentos caem para que 'eri' encontre 'érico' e
+        # dígitos ficam para que '1984' seja sugerido
+        decomposed = unicodedata.normalize('NFKD', text)
+        kept = ''.join(
+            c if c.isalnum() else ' '
+            for c in decomposed
+            if not unicodedata.combining(c)
+        )
+        return ' '.join(kept.lower().split())
+
+    def _keys(self, label: str) -> set[str]:
+        words = self.normalize(label).split(' ')
+        return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+    def _link(self, item_id: int, group: int):
+        self._groups[item_id] = group
+        self._members.setdefault(group, set()).add(item_id)
+
+    def load(self, items: list[tuple]):
+        self._labels, self._groups, self._members = {}, {}, {}
+        for item_id, label, *group in items:
+            self._labels[item_id] = label
+            if group:
+                self._link(item_id, group[0])
+
+        self._entries = sorted(
+            (key, item_id)
+            for item_id, label in self._labels.items()
+            for key in self._keys(label)
+        )
+
+    def add(self, item_id: int, label: str, group: int | None = None):
+        # Chamado depois do commit: uma falha aqui não pode derrubar uma
+        # escrita já gravada, então o índice só é marcado para recarga
+        try:
+            self._remove(item_id)
+            self._labels[item_id] = label
+            if group is not None:
+                self._link(item_id, group)
+            for key in self._keys(label):
+                insort(self._entries, (key, item_id))
+        except Exception:  # noqa: BLE001
+            self.stale = True
+
+    def remove(self, item_id: int):
+        try:
+            self._remove(item_id)
+        except Exception:  # noqa: BLE001
+            self.stale = True
+
+    def remove_group(self, group: int):
+        try:
+            for item_id in list(self._members.get(group, ())):
+                self._remove(item_id)
+        except Exception:  # noqa: BLE001
+            self.stale = True
+
+    def _remove(self, item_id: int):
+        group = self._groups.pop(item_id, None)
+        if group is not None:
+            members = self._members[group]
+            members.discard(item_id)
+            if not members:
+                del self._members[group]
+
+        label = self._labels.pop(item_id, None)
+        if label is None:
+            return
+
+        for key in self._keys(label):
+            position = bisect_left(self._entries, (key, item_id))
+            if position < len(self._entries) and self._entries[position] == (
+                key,
+                item_id,
+            ):
+                del self._entries[position]
+
+    def search(self, prefix: str, limit: int) -> list[tuple[int, str]]:
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+
+        found: dict[int, str] = {}
+        position = bisect_left(self._entries, (prefix, -1))
+
+        while len(found) < limit and position < len(self._entries):
+            key, item_id = self._entries[position]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(item_id, self._labels[item_id])
+            position += 1
+
+        return list(found.items())
+
+
+class Autocomplete:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.books = PrefixIndex()
+        self.novelists = PrefixIndex()
+        self.built = False
+
+    @property
+    def ready(self) -> bool:
+        # Um índice marcado como desatualizado é recarregado no próximo uso
+        return self.built and not (self.books.stale or self.novelists.stale)
+
+    async def build(self, session: AsyncSession):
+        books = await session.execute(
+            select(Book.id, Book.title, Book.novelist_id)
+        )
+        novelists = await session.execute(select(Novelist.id, Novelist.name))
+
+        self.books.load(books.tuples().all())
+        self.novelists.load(novelists.tuples().all())
+        self.books.stale = self.novelists.stale = False
+        self.built = True
+
+
+autocomplete = Autocomplete()
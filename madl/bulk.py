@@ -0,0 +1,65 @@
+from http import HTTPStatus
+from typing import Literal
+
+from madl.settings import Settings
+
+BULK_MAX_ITEMS = Settings().BULK_MAX_ITEMS
+
+BulkMode = Literal['partial', 'atomic']
+
+
+class BulkResult:
+    # Acompanha o resultado de cada item de uma criação em lote
+    def __init__(self, size: int):
+        self.results: list[dict | None] = [None] * size
+
+    def fail(self, index: int, status: str, detail: str):
+        self.results[index] = {
+            'index': index,
+            'status': status,
+            'detail': detail,
+        }
+
+    def create(self, index: int, item_id: int):
+        self.results[index] = {
+            'index': index,
+            'status': 'created',
+            'id': item_id,
+        }
+
+    def pending(self) -> list[int]:
+        return [i for i, result in enumerate(self.results) if result is None]
+
+    @property
+    def failed(self) -> int:
+        return sum(
+            1
+            for result in self.results
+            if result is not None and result['status'] != 'created'
+        )
+
+    def reject(self):
+        # No modo atômico nada é criado se algum item falhar
+        for index, result in enumerate(self.results):
+            if result is None or result['status'] == 'created':
+                self.results[index] = {
+                    'index': index,
+                    'status': 'skipped',
+                    'detail': 'Item não criado porque o lote foi rejeitado',
+                }
+
+    def as_response(self) -> dict:
+        created = sum(
+            1 for result in self.results if result['status'] == 'created'
+        )
+        return {
+            'created': created,
+            'failed': len(self.results) - created,
+            'results': self.results,
+        }
+
+
+def bulk_status_code(result: BulkResult) -> HTTPStatus:
+    if any(item['status'] == 'created' for item in result.results):
+        return HTTPStatus.CREATED
+    return HTTPStatus.UNPROCESSABLE_ENTITY
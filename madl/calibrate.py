@@ -0,0 +1,123 @@
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Callable
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from madl.settings import Settings
+
+MAX_TIME_COST = 50
+MIN_MEMORY_COST = 8 * 1024
+
+Measure = Callable[[int, int, int], float]
+
+
+def measure_hash(
+    time_cost: int, memory_cost: int, parallelism: int, rounds: int = 3
+) -> float:
+    hasher = Argon2Hasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.hash('calibracao do argon2')
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibrate(
+    target: float,
+    max_memory_cost: int,
+    parallelism: int,
+    measure: Measure = measure_hash,
+) -> dict:
+    # Prioriza memória, que encarece ataques com GPU, e só então iterações
+    memory_cost = max_memory_cost
+    while (
+        memory_cost > MIN_MEMORY_COST
+        and measure(1, memory_cost, parallelism) > target
+    ):
+        memory_cost //= 2
+
+    time_cost = 1
+    while (
+        time_cost < MAX_TIME_COST
+        and measure(time_cost + 1, memory_cost, parallelism) <= target
+    ):
+        time_cost += 1
+
+    return {
+        'ARGON2_TIME_COST': time_cost,
+        'ARGON2_MEMORY_COST': memory_cost,
+        'ARGON2_PARALLELISM': parallelism,
+    }
+
+
+def write_env(path: Path, values: dict):
+    lines = (
+        path.read_text(encoding='utf-8').splitlines() if path.exists() else []
+    )
+    pending = dict(values)
+
+    for index, line in enumerate(lines):
+        key = line.split('=', 1)[0].strip()
+        if key in pending:
+            lines[index] = f'{key}={pending.pop(key)}'
+
+    lines += [f'{key}={value}' for key, value in pending.items()]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def main(argv: list[str] | None = None):
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(
+        prog='python -m madl.calibrate',
+        description='Calibra o custo do Argon2 para um tempo alvo por hash.',
+    )
+    parser.add_argument(
+        '--target-ms',
+        type=float,
+        default=250,
+        help='tempo alvo de cada hash em milissegundos (250)',
+    )
+    parser.add_argument(
+        '--max-memory',
+        type=int,
+        default=settings.ARGON2_MEMORY_COST,
+        help='memória máxima por hash em KiB (ARGON2_MEMORY_COST atual)',
+    )
+    parser.add_argument(
+        '--parallelism', type=int, default=settings.ARGON2_PARALLELISM
+    )
+    parser.add_argument(
+        '--write',
+        type=Path,
+        metavar='ARQUIVO',
+        help='grava os valores no arquivo .env indicado',
+    )
+    args = parser.parse_args(argv)
+
+    values = calibrate(
+        args.target_ms / 1000, args.max_memory, args.parallelism
+    )
+    elapsed = measure_hash(
+        values['ARGON2_TIME_COST'],
+        values['ARGON2_MEMORY_COST'],
+        values['ARGON2_PARALLELISM'],
+    )
+
+    for key, value in values.items():
+        print(f'{key}={value}')
+    print(f'Tempo medido por hash: {elapsed * 1000:.0f} ms')
+
+    if args.write:
+        write_env(args.write, values)
+        print(f'Valores gravados em {args.write}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import csv
+import json
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import Connection, create_engine, text
+
+from madl.settings import Settings
+from madl.utils import sanitize_name
+
+CREATE_STAGING = text(
+    'CREATE TEMP TABLE IF NOT EXISTS import_staging '
+    '(title text, year text, novelist text) ON COMMIT DELETE ROWS'
+)
+
+COPY_STAGING = 'COPY import_staging (title, year, novelist) FROM STDIN'
+
+MERGE_NOVELISTS = text(
+    'INSERT INTO novelists (name) '
+    'SELECT DISTINCT novelist FROM import_staging '
+    'ON CONFLICT (name) DO NOTHING'
+)
+
+MERGE_BOOKS = text(
+    'INSERT INTO books (year, title, novelist_id) '
+    'SELECT DISTINCT ON (s.title) s.year, s.title, n.id '
+    'FROM import_staging s JOIN novelists n ON n.name = s.novelist '
+    'ORDER BY s.title '
+    'ON CONFLICT (title) DO NOTHING'
+)
+
+COUNT_UNKNOWN_NOVELISTS = text(
+    'SELECT count(*) FROM import_staging s '
+    'LEFT JOIN novelists n ON n.name = s.novelist WHERE n.id IS NULL'
+)
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    invalid: int = 0
+    inserted: int = 0
+    duplicated: int = 0
+    unknown_novelist: int = 0
+    started_at: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.read / elapsed if elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f'lidas={self.read} inseridas={self.inserted} '
+            f'duplicadas={self.duplicated} '
+            f'sem_romancista={self.unknown_novelist} '
+            f'invalidas={self.invalid} '
+            f'linhas/s={self.rows_per_second:.0f}'
+        )
+
+
+def read_records(
+    path: Path, file_format: str
+) -> Iterator[tuple[int, dict | str]]:
+    # Lê o arquivo linha a linha para manter o uso de memória constante. As
+    # linhas JSONL seguem cruas e são decodificadas em normalize, registro a
+    # registro, para que uma linha malformada não interrompa a importação
+    with path.open(encoding='utf-8', newline='') as file:
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield number, line
+
+
+def normalize(record: dict | str) -> tuple[str, str, str] | None:
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError('o registro não é um objeto')
+
+    title = str(record.get('title') or '').strip().lower()
+    year = str(record.get('year') or '').strip()
+    # sanitize_name espera acentos compostos, como os dos nomes já gravados
+    novelist = sanitize_name(
+        unicodedata.normalize('NFC', str(record.get('novelist') or ''))
+    )
+
+    if not (title and year and novelist):
+        return None
+
+    return title, year, novelist
+
+
+def merge_batch(
+    connection: Connection,
+    rows: list[tuple[str, str, str]],
+    create_novelists: bool,
+) -> tuple[int, int]:
+    with connection.connection.driver_connection.cursor() as cursor:
+        with cursor.copy(COPY_STAGING) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+    unknown_novelist = 0
+    if create_novelists:
+        connection.execute(MERGE_NOVELISTS)
+    else:
+        unknown_novelist = connection.scalar(COUNT_UNKNOWN_NOVELISTS)
+
+    inserted = connection.execute(MERGE_BOOKS).rowcount
+    connection.commit()
+
+    return inserted, unknown_novelist
+
+
+def import_catalog(  # noqa: PLR0913
+    records: Iterable[tuple[int, dict | str]],
+    database_url: str,
+    *,
+    batch_size: int = 10_000,
+    create_novelists: bool = False,
+    report=None,
+    report_invalid=None,
+) -> ImportStats:
+    stats = ImportStats(started_at=time.monotonic())
+    engine = create_engine(database_url)
+
+    with engine.connect() as connection:
+        connection.execute(CREATE_STAGING)
+        connection.commit()
+
+        for batch in batched(records, batch_size):
+            rows = []
+            for line, record in batch:
+                # Os lotes anteriores já foram gravados, então um registro
+                # ruim é contado e ignorado em vez de abortar a importação
+                try:
+                    row = normalize(record)
+                except Exception as error:  # noqa: BLE001
+                    row = None
+                    if report_invalid:
+                        report_invalid(line, error)
+                if row is None:
+                    stats.invalid += 1
+                else:
+                    rows.append(row)
+
+            inserted, unknown_novelist = merge_batch(
+                connection, rows, create_novelists
+            )
+
+            stats.read += len(batch)
+            stats.inserted += inserted
+            stats.unknown_novelist += unknown_novelist
+            stats.duplicated += len(rows) - inserted - unknown_novelist
+
+            if report:
+                report(stats)
+
+    engine.dispose()
+    return stats
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m madl.import',
+        description='Importa um catálogo de livros em CSV ou JSONL.',
+    )
+    parser.add_argument('path', type=Path, help='arquivo CSV ou JSONL')
+    parser.add_argument(
+        '--format',
+        choices=['csv', 'jsonl'],
+        help='formato do arquivo, deduzido pela extensão se omitido',
+    )
+    parser.add_argument(
+        '--create-novelists',
+        action='store_true',
+        help='cria os romancistas que ainda não constam no MADR',
+    )
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument(
+        '--database-url', help='padrão: DATABASE_URL das configurações'
+    )
+    args = parser.parse_args(argv)
+
+    file_format = args.format or (
+        'csv' if args.path.suffix.lower() == '.csv' else 'jsonl'
+    )
+
+    stats = import_catalog(
+        read_records(args.path, file_format),
+        args.database_url or Settings().DATABASE_URL,
+        batch_size=args.batch_size,
+        create_novelists=args.create_novelists,
+        report=lambda stats: print(stats, file=sys.stderr),
+        report_invalid=lambda line, error: print(
+            f'Linha {line} ignorada: {error}', file=sys.stderr
+        ),
+    )
+
+    print(f'Importação concluída: {stats}')
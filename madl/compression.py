@@ -0,0 +1,244 @@
+import zlib
+
+import anyio
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from madl.settings import Settings
+
+settings = Settings()
+
+# Conteúdos já comprimidos, como imagens, não ganham nada com outra passada
+COMPRESSIBLE_TYPES = ('text/', 'json', 'xml', 'javascript', 'msgpack')
+
+NOT_MODIFIED = 304
+NOT_MODIFIED_OR_EMPTY = {204, NOT_MODIFIED}
+
+
+class GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def chunk(self, data: bytes) -> bytes:
+        # O flush a cada parte entrega ao cliente o que já foi produzido
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(
+            level=settings.COMPRESSION_ZSTD_LEVEL
+        ).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# Em ordem de preferência para desempatar pesos iguais no Accept-Encoding
+ENCODERS = {'zstd': ZstdEncoder, 'br': BrotliEncoder, 'gzip': GzipEncoder}
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    # '*' vale para as codificações que o cliente não citou
+    default = weights.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for name in ENCODERS:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    content_type = headers.get('content-type', '')
+    return 'content-encoding' not in headers and any(
+        kind in content_type for kind in COMPRESSIBLE_TYPES
+    )
+
+
+def weaken_etag(headers: MutableHeaders):
+    # A representação comprimida não é idêntica byte a byte à original
+    etag = headers.get('etag')
+    if etag is not None and not etag.startswith('W/'):
+        headers['ETag'] = f'W/{etag}'
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int, thread_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get('accept-encoding', ''))
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            if_none_match = {tag.strip() for tag in if_none_match.split(',')}
+        responder = CompressionResponder(self, encoding, if_none_match, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: str | None,
+        if_none_match: set[str] | None,
+        send: Send,
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self._send = send
+        self._start: Message | None = None
+        self._encoder = None
+        self._passthrough = False
+
+    async def _run(self, function, data: bytes) -> bytes:
+        # Corpos grandes são comprimidos fora do loop para não travar as
+        # demais requisições do worker
+        if len(data) >= self.middleware.thread_size:
+            return await anyio.to_thread.run_sync(function, data)
+        return function(data)
+
+    async def send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self._start = message
+            return
+
+        if message['type'] != 'http.response.body':
+            await self._send(message)
+            return
+
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self._encoder is None:
+            await self._begin(body, more_body)
+            return
+
+        if more_body:
+            data = await self._run(self._encoder.chunk, body)
+            if data:
+                await self._send({
+                    'type': 'http.response.body',
+                    'body': data,
+                    'more_body': True,
+                })
+        else:
+            await self._send({
+                'type': 'http.response.body',
+                'body': await self._run(self._encoder.finish, body),
+            })
+
+    async def _begin(self, body: bytes, more_body: bool):
+        start = self._start
+        headers = MutableHeaders(raw=start['headers'])
+        compressible = is_compressible(headers) and (
+            start['status'] not in NOT_MODIFIED_OR_EMPTY
+        )
+
+        if compressible:
+            headers.add_vary_header('Accept-Encoding')
+
+        # O 304 não tem corpo para saber se o 200 sairia comprimido; ele
+        # devolve o ETag na forma que o cliente guardou, fraca se ela veio
+        # de um 200 comprimido, para que caches selecionem essa resposta.
+        # Sem If-None-Match, a forma fraca casa com as duas pela comparação
+        # fraca
+        if start['status'] == NOT_MODIFIED and 'etag' in headers:
+            headers.add_vary_header('Accept-Encoding')
+            if (
+                self.if_none_match is None
+                and self.encoding is not None
+                or f'W/{headers["etag"]}' in (self.if_none_match or set())
+            ):
+                weaken_etag(headers)
+
+        # Respostas completas abaixo do limite não compensam a compressão;
+        # as de streaming não têm tamanho conhecido e são sempre comprimidas
+        if (
+            not compressible
+            or self.encoding is None
+            or (not more_body and len(body) < self.middleware.minimum_size)
+        ):
+            self._passthrough = True
+            await self._send(start)
+            await self._send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': more_body,
+            })
+            return
+
+        self._encoder = ENCODERS[self.encoding]()
+        headers['Content-Encoding'] = self.encoding
+        weaken_etag(headers)
+
+        if more_body:
+            del headers['Content-Length']
+            await self._send(start)
+            await self._send({
+                'type': 'http.response.body',
+                'body': await self._run(self._encoder.chunk, body),
+                'more_body': True,
+            })
+            return
+
+        data = await self._run(self._encoder.finish, body)
+        headers['Content-Length'] = str(len(data))
+        await self._send(start)
+        await self._send({'type': 'http.response.body', 'body': data})
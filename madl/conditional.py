@@ -0,0 +1,66 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+import orjson
+from fastapi import Request
+
+
+def make_validators(
+    last_modified: datetime | None, *parts
+) -> tuple[str, str | None]:
+    # Colunas sem fuso são tratadas como UTC; como o cliente devolve o mesmo
+    # valor que enviamos, a comparação continua consistente
+    if last_modified is not None and last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    digest = hashlib.sha256(
+        repr((*parts, last_modified and last_modified.isoformat())).encode()
+    ).hexdigest()[:32]
+
+    return f'"{digest}"', (
+        format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+        if last_modified is not None
+        else None
+    )
+
+
+def content_etag(content: Any) -> str:
+    # Listas não têm um updated_at próprio: o ETag vem da página já montada,
+    # então muda com as linhas e com o total, qualquer que seja a contagem
+    digest = hashlib.sha256(orjson.dumps(content)).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def validator_headers(etag: str, last_modified: str | None) -> dict:
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = last_modified
+    return headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: str | None
+) -> bool:
+    # If-None-Match tem precedência e ignora If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {
+            tag.strip().removeprefix('W/') for tag in if_none_match.split(',')
+        }
+        return '*' in tags or etag in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        return False
+
+    return parsedate_to_datetime(last_modified) <= since
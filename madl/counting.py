@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Literal
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.settings import Settings
+
+settings = Settings()
+
+CountStrategy = Literal['exact', 'cached', 'estimate', 'window']
+
+RELTUPLES_QUERY = text(
+    'SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)'
+)
+
+
+class CountCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+
+    def get(self, key: tuple) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, total = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return total
+
+    def set(self, key: tuple, total: int):
+        self._entries[key] = (time.monotonic() + self.ttl, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+count_cache = CountCache(
+    ttl=settings.COUNT_CACHE_TTL, max_entries=settings.COUNT_CACHE_MAX_ENTRIES
+)
+
+
+def query_key(query: Select) -> tuple:
+    # A consulta compilada e seus parâmetros identificam o conjunto de filtros
+    compiled = query.compile()
+    return str(compiled), tuple(sorted(compiled.params.items()))
+
+
+async def exact_count(session: AsyncSession, query: Select) -> int:
+    return await session.scalar(
+        select(func.count()).select_from(query.subquery())
+    )
+
+
+async def estimate_count(session: AsyncSession, query: Select) -> int:
+    # Sem filtros a estatística da tabela em pg_class é suficiente
+    if query.whereclause is None:
+        table = query.get_final_froms()[0]
+        estimate = await session.scalar(RELTUPLES_QUERY, {'table': table.name})
+        # reltuples é -1 enquanto a tabela nunca foi analisada
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+
+    connection = await session.connection()
+    compiled = query.compile(dialect=connection.dialect)
+    plan = await connection.exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    )
+    return int(plan.scalar()[0]['Plan']['Plan Rows'])
+
+
+async def count_rows(
+    session: AsyncSession, query: Select, strategy: CountStrategy
+) -> tuple[int, str]:
+    if strategy == 'estimate':
+        return await estimate_count(session, query), 'estimate'
+
+    if strategy == 'cached':
+        key = query_key(query)
+        total = count_cache.get(key)
+        if total is None:
+            total = await exact_count(session, query)
+            count_cache.set(key, total)
+        return total, 'cached'
+
+    return await exact_count(session, query), 'exact'
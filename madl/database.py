@@ -1,11 +1,51 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from madl.pool_metrics import MeteredQueuePool, pool_metrics
+from madl.replicas import ReplicaSet
 from madl.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
+settings = Settings()
+
+pool_options = {
+    'pool_size': settings.DATABASE_POOL_SIZE,
+    'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+    'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+    'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+    'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+}
+
+engine = create_async_engine(
+    settings.DATABASE_URL, poolclass=MeteredQueuePool, **pool_options
+)
+
+pool_metrics.listen(engine)
+
+replicas = ReplicaSet(
+    [
+        create_async_engine(url, **pool_options)
+        for url in settings.DATABASE_REPLICA_URLS
+    ],
+    max_lag=settings.DATABASE_REPLICA_MAX_LAG,
+    check_interval=settings.DATABASE_REPLICA_CHECK_INTERVAL,
+    check_timeout=settings.DATABASE_REPLICA_CHECK_TIMEOUT,
+)
+
+
+async def get_session():
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+# Sessão somente leitura: usa uma réplica saudável ou, na falta, o primário
+@asynccontextmanager
+async def read_session():
+    bind = await replicas.pick() or engine
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        yield session
 
 
-def get_session():
-    with Session(engine) as session:
+async def get_read_session():
+    async with read_session() as session:
         yield session
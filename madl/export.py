@@ -0,0 +1,72 @@
+import csv
+import io
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.settings import Settings
+
+settings = Settings()
+
+ExportFormat = Literal['ndjson', 'csv']
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+async def stream_rows(
+    session: AsyncSession,
+    query: Select,
+    schema: type[BaseModel],
+    file_format: ExportFormat,
+) -> AsyncIterator[str]:
+    fields = list(schema.model_fields)
+
+    try:
+        if file_format == 'csv':
+            yield ','.join(fields) + '\r\n'
+
+        # stream_scalars usa um cursor no servidor e yield_per limita
+        # quantas linhas ficam em memória a cada lote
+        result = await session.stream_scalars(
+            query, execution_options={'yield_per': settings.EXPORT_BATCH_SIZE}
+        )
+
+        async for partition in result.partitions():
+            items = [
+                schema.model_validate(row, from_attributes=True)
+                for row in partition
+            ]
+
+            if file_format == 'ndjson':
+                yield ''.join(item.model_dump_json() + '\n' for item in items)
+            else:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for item in items:
+                    writer.writerow(item.model_dump(mode='json').values())
+                yield buffer.getvalue()
+    finally:
+        # A sessão é fechada aqui porque o corpo é enviado depois que a
+        # rota retorna
+        await session.close()
+
+
+def export_response(
+    session: AsyncSession,
+    query: Select,
+    schema: type[BaseModel],
+    file_format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    return StreamingResponse(
+        stream_rows(session, query, schema, file_format),
+        media_type=MEDIA_TYPES[file_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="{filename}.{file_format}"'
+            )
+        },
+    )
@@ -0,0 +1,162 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from threading import Lock
+
+from fastapi import HTTPException
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from madl.settings import Settings
+
+settings = Settings()
+
+# Os custos vêm das configurações; ajuste-os com python -m madl.calibrate
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    ),
+))
+
+
+# Executadas nos processos do pool, por isso ficam no nível do módulo
+def get_password_hash(password: str):
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    # Devolve também um novo hash quando o atual usa custos desatualizados
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def overloaded_error() -> HTTPException:
+    return HTTPException(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        detail='Serviço sobrecarregado, tente novamente',
+        headers={'Retry-After': '1'},
+    )
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Executor | None = None
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pending = 0
+            self.completed = 0
+            self.rejected = 0
+            self.timeouts = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+
+    def _get_executor(self) -> Executor | None:
+        # Com zero processos o hash roda no threadpool padrão do loop
+        if self.workers <= 0:
+            return None
+
+        if self._executor is None:
+            # spawn evita herdar threads e conexões do processo da API
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    def _finish(self, start: float, future: asyncio.Future | None = None):
+        # Consome o erro de tarefas abandonadas pelo timeout
+        if future is not None and not future.cancelled():
+            future.exception()
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+
+    async def _run(self, function, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise overloaded_error()
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), function, *args
+            )
+        except BaseException:
+            self._finish(start)
+            raise
+
+        # A fila só diminui quando o processo termina, mesmo após o timeout
+        future.add_done_callback(lambda done: self._finish(start, done))
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise overloaded_error()
+        except BrokenProcessPool:
+            self._executor = None
+            raise overloaded_error()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            verify_password, plain_password, hashed_password
+        )
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            verify_and_update_password, plain_password, hashed_password
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latency_avg = (
+                self.latency_total / self.completed if self.completed else 0
+            )
+            return {
+                'workers': self.workers,
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'latency_avg_ms': latency_avg * 1000,
+                'latency_max_ms': self.latency_max * 1000,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
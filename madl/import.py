@@ -0,0 +1,5 @@
+# Permite executar a importação com: python -m madl.import arquivo.csv
+from madl.catalog_import import main
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,58 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import (
+    DDL,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    event,
+    func,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
 
+# Configuração de busca textual que remove acentos e coloca em minúsculas,
+# assim 'jose' encontra 'josé' nos nomes gravados por sanitize_name
+TEXT_SEARCH_CONFIG = 'madl'
+
+CREATE_TEXT_SEARCH_CONFIG = f"""
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_ts_config WHERE cfgname = '{TEXT_SEARCH_CONFIG}'
+    ) THEN
+        CREATE TEXT SEARCH CONFIGURATION {TEXT_SEARCH_CONFIG} (COPY = simple);
+        ALTER TEXT SEARCH CONFIGURATION {TEXT_SEARCH_CONFIG}
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+    END IF;
+END
+$$
+"""
+
+# Os índices GIN de trigramas dependem da extensão pg_trgm e a busca
+# textual depende da extensão unaccent
+for statement in (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    CREATE_TEXT_SEARCH_CONFIG,
+):
+    event.listen(table_registry.metadata, 'before_create', DDL(statement))
+
+
+def search_vector(column: str):
+    return mapped_column(
+        TSVECTOR,
+        Computed(
+            f"to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, {column})",
+            persisted=True,
+        ),
+        init=False,
+        deferred=True,
+    )
+
 
 @table_registry.mapped_as_dataclass
 class Account:
@@ -14,6 +62,10 @@ class Account:
     username: Mapped[str] = mapped_column(unique=True)
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
+    # Incrementado quando os dados da conta mudam, invalidando tokens antigos
+    token_version: Mapped[int] = mapped_column(
+        init=False, default=0, server_default='0'
+    )
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
@@ -25,11 +77,27 @@ class Account:
 @table_registry.mapped_as_dataclass
 class Novelist:
     __tablename__ = 'novelists'
+    __table_args__ = (
+        Index(
+            'ix_novelists_name_trgm',
+            'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_novelists_search_vector',
+            'search_vector',
+            postgresql_using='gin',
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str] = mapped_column(unique=True)
     books: Mapped[list['Book']] = relationship(
-        init=False, back_populates='novelist', cascade='all, delete-orphan'
+        init=False,
+        back_populates='novelist',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
     )
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
@@ -37,16 +105,32 @@ class Novelist:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    search_vector: Mapped[str] = search_vector('name')
 
 
 @table_registry.mapped_as_dataclass
 class Book:
     __tablename__ = 'books'
+    __table_args__ = (
+        Index(
+            'ix_books_title_trgm',
+            'title',
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_books_search_vector',
+            'search_vector',
+            postgresql_using='gin',
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     year: Mapped[str]
     title: Mapped[str] = mapped_column(unique=True)
-    novelist_id: Mapped[int] = mapped_column(ForeignKey('novelists.id'))
+    novelist_id: Mapped[int] = mapped_column(
+        ForeignKey('novelists.id', ondelete='CASCADE'), index=True
+    )
     novelist: Mapped['Novelist'] = relationship(
         init=False, back_populates='books'
     )
@@ -56,3 +140,31 @@ class Book:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    search_vector: Mapped[str] = search_vector('title')
+
+
+# Baldes do limitador de requisições compartilhados entre workers; UNLOGGED
+# porque perder os saldos num crash do banco apenas reinicia os limites
+@table_registry.mapped_as_dataclass
+class RateLimitBucket:
+    __tablename__ = 'rate_limit_buckets'
+    __table_args__ = {'prefixes': ['UNLOGGED']}
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    tokens: Mapped[float]
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RevokedToken:
+    __tablename__ = 'revoked_tokens'
+
+    jti: Mapped[str] = mapped_column(primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    revoked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), init=False, server_default=func.now()
+    )
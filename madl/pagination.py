@@ -0,0 +1,142 @@
+import base64
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from madl.counting import CountStrategy, count_rows
+from madl.serialization import row_dicts
+
+invalid_cursor_exception = HTTPException(
+    status_code=HTTPStatus.BAD_REQUEST,
+    detail='Cursor inválido',
+)
+
+
+def encode_cursor(order_by: str, direction: str, key: list) -> str:
+    payload = json.dumps(
+        {'o': order_by, 'd': direction, 'k': key}, separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(
+    cursor: str, order_by: str, columns: list[InstrumentedAttribute]
+) -> tuple[str, list | None]:
+    # Cursor vazio indica o início da listagem
+    if not cursor:
+        return 'next', None
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        direction, key = payload['d'], payload['k']
+        valid = (
+            payload['o'] == order_by
+            and direction in {'next', 'prev'}
+            and len(key) == len(columns)
+            # bool é subclasse de int, mas não serve de chave para o SQL
+            and all(
+                isinstance(value, column.type.python_type)
+                and not isinstance(value, bool)
+                for value, column in zip(key, columns)
+            )
+        )
+    except (ValueError, KeyError, TypeError):
+        raise invalid_cursor_exception
+
+    if not valid:
+        raise invalid_cursor_exception
+
+    return direction, key
+
+
+async def paginate_keyset(  # noqa: PLR0913, PLR0917
+    session: AsyncSession,
+    query: Select,
+    columns: list[InstrumentedAttribute],
+    order_by: str,
+    cursor: str,
+    per_page: int,
+):
+    direction, key = decode_cursor(cursor, order_by, columns)
+
+    sort_key = tuple_(*columns) if len(columns) > 1 else columns[0]
+
+    if key is not None:
+        bound = tuple_(*key) if len(columns) > 1 else key[0]
+        query = query.where(
+            sort_key > bound if direction == 'next' else sort_key < bound
+        )
+
+    if direction == 'next':
+        query = query.order_by(*columns)
+    else:
+        query = query.order_by(*(column.desc() for column in columns))
+
+    # Busca um registro a mais para saber se existe outra página
+    rows = row_dicts(await session.execute(query.limit(per_page + 1)))
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if direction == 'prev':
+        rows.reverse()
+
+    def cursor_from(row, cursor_direction):
+        return encode_cursor(
+            order_by,
+            cursor_direction,
+            [row[column.key] for column in columns],
+        )
+
+    if direction == 'next':
+        has_next, has_prev = has_more, key is not None
+    else:
+        has_next, has_prev = True, has_more
+
+    next_cursor = cursor_from(rows[-1], 'next') if rows and has_next else None
+    prev_cursor = cursor_from(rows[0], 'prev') if rows and has_prev else None
+
+    return rows, next_cursor, prev_cursor
+
+
+async def paginate_offset(  # noqa: PLR0913, PLR0917
+    session: AsyncSession,
+    query: Select,
+    columns: list[InstrumentedAttribute],
+    page: int,
+    per_page: int,
+    count: CountStrategy,
+    count_query: Select | None = None,
+):
+    query_page = (
+        query.order_by(*columns).offset((page - 1) * per_page).limit(per_page)
+    )
+    # O total pode vir de uma consulta sem os JOINs que só enriquecem as
+    # linhas da página
+    if count_query is None:
+        count_query = query
+
+    if count != 'window':
+        total, total_kind = await count_rows(session, count_query, count)
+        rows = row_dicts(await session.execute(query_page))
+        return rows, total, total_kind
+
+    # O total vem na mesma consulta da página por uma função de janela
+    result = await session.execute(
+        query_page.add_columns(func.count().over().label('window_total'))
+    )
+    rows, totals = [], []
+    for row in row_dicts(result):
+        totals.append(row.pop('window_total'))
+        rows.append(row)
+
+    # Uma página além do fim não traz linhas, então o total é contado à parte
+    if not rows and page > 1:
+        total, _ = await count_rows(session, count_query, 'exact')
+        return rows, total, 'window'
+
+    return rows, totals[0] if totals else 0, 'window'
@@ -0,0 +1,95 @@
+import time
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_opened = 0
+            self.connections_closed = 0
+            self.connections_invalidated = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.checkout_timeouts = 0
+            self.wait_count = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def _increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def listen(self, engine: AsyncEngine):
+        # Os eventos do pool são emitidos pela engine síncrona interna
+        target = engine.sync_engine
+
+        event.listen(
+            target, 'connect', lambda *_: self._increment('connections_opened')
+        )
+        event.listen(
+            target, 'close', lambda *_: self._increment('connections_closed')
+        )
+        event.listen(
+            target,
+            'invalidate',
+            lambda *_: self._increment('connections_invalidated'),
+        )
+        event.listen(
+            target, 'checkout', lambda *_: self._increment('checkouts')
+        )
+        event.listen(target, 'checkin', lambda *_: self._increment('checkins'))
+
+    def snapshot(self, engine: AsyncEngine) -> dict:
+        pool = engine.pool
+
+        with self._lock:
+            wait_avg = (
+                self.wait_total / self.wait_count if self.wait_count else 0
+            )
+            return {
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'overflow': pool.overflow(),
+                'connections_opened': self.connections_opened,
+                'connections_closed': self.connections_closed,
+                'connections_invalidated': self.connections_invalidated,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'checkout_timeouts': self.checkout_timeouts,
+                'checkout_wait_avg_ms': wait_avg * 1000,
+                'checkout_wait_max_ms': self.wait_max * 1000,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+# Pool que mede o tempo de espera de cada checkout de conexão
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.models import Account
+from madl.settings import Settings
+
+settings = Settings()
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_entries: int, sync_interval: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+        self._entries: OrderedDict[tuple, tuple[float, Account]] = (
+            OrderedDict()
+        )
+        self._synced_at = 0.0
+
+    async def sync(self, session: AsyncSession):
+        # invalidate só alcança o processo que atendeu a escrita; os demais
+        # conferem de tempos em tempos, numa única consulta pela chave
+        # primária, se as contas em cache ainda existem na mesma versão
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+
+        cached = {account.id for _, account in self._entries.values()}
+        if not cached:
+            return
+
+        versions = dict(
+            (
+                await session.execute(
+                    select(Account.id, Account.token_version).where(
+                        Account.id.in_(cached)
+                    )
+                )
+            ).all()
+        )
+        for key, (_, account) in list(self._entries.items()):
+            if versions.get(account.id) != account.token_version:
+                del self._entries[key]
+
+    def get(self, key: tuple) -> Account | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, account = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return account
+
+    def set(self, key: tuple, account: Account):
+        if self.ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, account)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, account_id: int):
+        # A mesma conta pode estar em cache pelo email e pelo id
+        for key, (_, account) in list(self._entries.items()):
+            if account.id == account_id:
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+        self._synced_at = 0.0
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    sync_interval=settings.PRINCIPAL_CACHE_SYNC_INTERVAL,
+)
@@ -0,0 +1,159 @@
+import math
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Annotated, Protocol
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from madl.database import engine
+from madl.models import Account
+from madl.security import get_current_user
+from madl.settings import Settings
+
+settings = Settings()
+
+# A recarga usa o relógio do banco e o upsert trava a linha até o fim da
+# transação, assim vários workers compartilham o mesmo balde sem corrida
+REFILL_BUCKET = text("""
+INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+VALUES (:key, :capacity, statement_timestamp())
+ON CONFLICT (key) DO UPDATE SET
+    tokens = LEAST(
+        :capacity,
+        b.tokens + :rate * GREATEST(
+            0, EXTRACT(EPOCH FROM statement_timestamp() - b.updated_at)
+        )
+    ),
+    updated_at = statement_timestamp()
+RETURNING tokens
+""")
+
+TAKE_TOKENS = text(
+    'UPDATE rate_limit_buckets SET tokens = tokens - :cost WHERE key = :key'
+)
+
+
+class RateLimitBackend(Protocol):
+    # Consome do balde e devolve os segundos de espera, 0 quando permitido
+    async def consume(
+        self, key: str, capacity: int, rate: float, cost: int = 1
+    ) -> float: ...
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def consume(
+        self, key: str, capacity: int, rate: float, cost: int = 1
+    ) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # Baldes ociosos há mais tempo saem primeiro quando o limite estoura
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return wait
+
+
+class DatabaseBackend:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def consume(
+        self, key: str, capacity: int, rate: float, cost: int = 1
+    ) -> float:
+        async with self.engine.begin() as connection:
+            tokens = await connection.scalar(
+                REFILL_BUCKET, {'key': key, 'capacity': capacity, 'rate': rate}
+            )
+            if tokens < cost:
+                return (cost - tokens) / rate
+
+            await connection.execute(TAKE_TOKENS, {'key': key, 'cost': cost})
+        return 0.0
+
+
+def parse_rule(rule: str) -> tuple[int, float] | None:
+    # '5/60' libera 5 requisições seguidas e repõe 5 a cada 60 segundos
+    if not rule:
+        return None
+
+    capacity, seconds = rule.split('/')
+    return int(capacity), int(capacity) / float(seconds)
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def check(self, key: str, rule: str):
+        parsed = parse_rule(rule)
+        if parsed is None:
+            return
+
+        capacity, rate = parsed
+        wait = await self.backend.consume(key, capacity, rate)
+
+        if wait > 0:
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Muitas requisições, tente novamente mais tarde',
+                headers={'Retry-After': str(math.ceil(wait))},
+            )
+
+
+rate_limiter = RateLimiter(
+    DatabaseBackend(engine)
+    if settings.RATE_LIMIT_BACKEND == 'database'
+    else MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+)
+
+
+def client_ip(request: Request) -> str:
+    # Atrás de um proxy, rode o uvicorn com --proxy-headers
+    return request.client.host if request.client else 'unknown'
+
+
+async def limit_login(
+    request: Request,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+):
+    await rate_limiter.check(
+        f'login:ip:{client_ip(request)}', settings.RATE_LIMIT_LOGIN_PER_IP
+    )
+    await rate_limiter.check(
+        f'login:account:{form_data.username.lower()}',
+        settings.RATE_LIMIT_LOGIN_PER_ACCOUNT,
+    )
+
+
+async def limit_signup(request: Request):
+    await rate_limiter.check(
+        f'signup:ip:{client_ip(request)}', settings.RATE_LIMIT_SIGNUP_PER_IP
+    )
+
+
+async def get_rate_limited_user(
+    current_user: Annotated[Account, Depends(get_current_user)],
+):
+    await rate_limiter.check(
+        f'writes:account:{current_user.id}',
+        settings.RATE_LIMIT_WRITES_PER_ACCOUNT,
+    )
+    return current_user
@@ -0,0 +1,73 @@
+import asyncio
+import itertools
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Atraso de replicação em segundos. Uma réplica sem WAL pendente está em dia
+# mesmo que a última transação aplicada seja antiga. No primário as funções
+# retornam NULL, então o atraso é considerado zero.
+REPLICATION_LAG_QUERY = text(
+    'SELECT CASE'
+    ' WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0'
+    ' ELSE COALESCE('
+    'EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+    ' END'
+)
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        check_timeout: float,
+    ):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._health: dict[AsyncEngine, tuple[float, bool]] = {}
+        self._counter = itertools.count()
+
+    @staticmethod
+    async def _replication_lag(engine: AsyncEngine) -> float:
+        async with engine.connect() as conn:
+            return float(await conn.scalar(REPLICATION_LAG_QUERY))
+
+    async def is_healthy(self, engine: AsyncEngine) -> bool:
+        now = time.monotonic()
+        checked_at, healthy = self._health.get(engine, (None, False))
+
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return healthy
+
+        # Marca a verificação antes de aguardar para que requisições
+        # concorrentes não disparem a mesma checagem ao mesmo tempo
+        self._health[engine] = (now, healthy)
+
+        try:
+            lag = await asyncio.wait_for(
+                self._replication_lag(engine), self.check_timeout
+            )
+            healthy = lag <= self.max_lag
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+            healthy = False
+
+        self._health[engine] = (time.monotonic(), healthy)
+        return healthy
+
+    async def pick(self) -> AsyncEngine | None:
+        # Round-robin entre as réplicas saudáveis, None se nenhuma estiver
+        total = len(self.engines)
+        start = next(self._counter)
+
+        for offset in range(total):
+            engine = self.engines[(start + offset) % total]
+            if await self.is_healthy(engine):
+                return engine
+
+        return None
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncContextManager, Awaitable, Callable, Iterable
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.database import read_session
+from madl.settings import Settings
+
+settings = Settings()
+
+Loader = Callable[[AsyncSession], Awaitable[Any]]
+ValueTags = Callable[[Any], Iterable[str]]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    tags: frozenset[str]
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+class ResultCache:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        ttl: float,
+        stale_ttl: float,
+        max_entries: int,
+        max_bytes: int,
+        session_factory: Callable[
+            [], AsyncContextManager[AsyncSession]
+        ] = read_session,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.session_factory = session_factory
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._tags: dict[str, set[tuple]] = {}
+        self._refreshing: dict[tuple, asyncio.Task] = {}
+        # Muda a cada invalidação para descartar cargas iniciadas antes dela
+        self._generation = 0
+        self.size = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get_or_load(
+        self,
+        key: tuple,
+        tags: set[str],
+        session: AsyncSession,
+        load: Loader,
+        value_tags: ValueTags | None = None,
+    ) -> Any:
+        # value_tags acrescenta tags que só se conhecem depois da carga, como
+        # o romancista de um livro buscado pelo id
+        if self.ttl <= 0:
+            return await load(session)
+
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            if now < entry.fresh_until:
+                self.hits += 1
+                return entry.value
+
+            # Vencida mas dentro da janela: responde já e recarrega ao fundo
+            self.stale_hits += 1
+            if key not in self._refreshing:
+                self._refreshing[key] = asyncio.create_task(
+                    self._refresh(key, tags, load, value_tags)
+                )
+            return entry.value
+
+        self.misses += 1
+        generation = self._generation
+        value = await load(session)
+        self._store(key, tags, value, generation, value_tags)
+        return value
+
+    async def _refresh(
+        self,
+        key: tuple,
+        tags: set[str],
+        load: Loader,
+        value_tags: ValueTags | None,
+    ):
+        generation = self._generation
+        try:
+            # A sessão da requisição já foi fechada, então abre uma própria
+            async with self.session_factory() as session:
+                value = await load(session)
+            self._store(key, tags, value, generation, value_tags)
+        except Exception:  # noqa: BLE001
+            # Sem recarga a entrada vencida apenas expira no prazo normal
+            pass
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _store(  # noqa: PLR0913, PLR0917
+        self,
+        key: tuple,
+        tags: set[str],
+        value: Any,
+        generation: int,
+        value_tags: ValueTags | None = None,
+    ):
+        if generation != self._generation:
+            return
+
+        if value_tags is not None:
+            tags = {*tags, *value_tags(value)}
+
+        # O orjson mede o valor no mesmo formato em que ele é servido, sem
+        # devolver ao caminho quente o custo do json da biblioteca padrão
+        size = len(orjson.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        self._discard(key)
+
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(
+            value=value,
+            tags=frozenset(tags),
+            size=size,
+            fresh_until=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_ttl,
+        )
+        self.size += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while (
+            len(self._entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        self.size -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, *tags: str):
+        self._generation += 1
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                self._discard(key)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'size_bytes': self.size,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+        }
+
+
+result_cache = ResultCache(
+    ttl=settings.RESULT_CACHE_TTL,
+    stale_ttl=settings.RESULT_CACHE_STALE_TTL,
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+)
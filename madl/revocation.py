@@ -0,0 +1,143 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.models import RevokedToken
+from madl.settings import Settings
+
+settings = Settings()
+
+# Revogações gravadas por outros workers podem chegar fora de ordem, então
+# cada sincronização relê uma pequena janela já vista
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Dupla dispersão: k posições derivadas de um único digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        )
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position // 8] |= 1 << position % 8
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position // 8] & 1 << position % 8
+            for position in self._positions(item)
+        )
+
+
+class TokenDenylist:
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        sync_interval: float,
+        rebuild_interval: float,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.reset()
+
+    def reset(self):
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._rebuilt_at: float | None = None
+        self._synced_at = 0.0
+        self._since: datetime | None = None
+        self.lookups = 0
+
+    def _add(self, rows):
+        for jti, revoked_at in rows:
+            self._bloom.add(jti)
+            if self._since is None or revoked_at > self._since:
+                self._since = revoked_at
+
+    async def sync(self, session: AsyncSession):
+        now = time.monotonic()
+
+        # Recria o filtro de tempos em tempos para descartar tokens vencidos
+        if (
+            self._rebuilt_at is None
+            or now - self._rebuilt_at >= self.rebuild_interval
+        ):
+            rows = await session.execute(
+                select(RevokedToken.jti, RevokedToken.revoked_at).where(
+                    RevokedToken.expires_at > func.now()
+                )
+            )
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._since = None
+            self._add(rows)
+            self._rebuilt_at = self._synced_at = now
+            return
+
+        if now - self._synced_at >= self.sync_interval:
+            query = select(RevokedToken.jti, RevokedToken.revoked_at)
+            if self._since is not None:
+                query = query.where(
+                    RevokedToken.revoked_at > self._since - SYNC_OVERLAP
+                )
+            self._add(await session.execute(query))
+            self._synced_at = now
+
+    async def is_revoked(self, session: AsyncSession, jti: str) -> bool:
+        await self.sync(session)
+
+        # O caso comum, token não revogado, não consulta o banco
+        if jti not in self._bloom:
+            return False
+
+        self.lookups += 1
+        return await session.scalar(
+            select(
+                exists().where(
+                    RevokedToken.jti == jti,
+                    RevokedToken.expires_at > func.now(),
+                )
+            )
+        )
+
+    async def revoke(
+        self, session: AsyncSession, jti: str, expires_at: datetime
+    ):
+        await session.execute(
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing()
+        )
+        # Entradas vencidas já não protegem nada, pois o token expirou
+        await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= func.now())
+        )
+        await session.commit()
+
+        self._bloom.add(jti)
+
+
+token_denylist = TokenDenylist(
+    capacity=settings.TOKEN_DENYLIST_CAPACITY,
+    error_rate=settings.TOKEN_DENYLIST_ERROR_RATE,
+    sync_interval=settings.TOKEN_DENYLIST_SYNC_INTERVAL,
+    rebuild_interval=settings.TOKEN_DENYLIST_REBUILD_INTERVAL,
+)
@@ -2,20 +2,24 @@ from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from madl.database import get_session
+from madl.hashing import password_hasher
 from madl.models import Account
+from madl.principals import principal_cache
+from madl.rate_limit import get_rate_limited_user, limit_signup
 from madl.schemas.account_schema import AccountPublicSchema, AccountSchema
 from madl.schemas.message_schema import MessageSchema
-from madl.security import get_current_user, get_password_hash
 from madl.utils import sanitize_email, sanitize_name
 
 router = APIRouter(prefix='/accounts', tags=['Accounts'])
 
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[Account, Depends(get_current_user)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_CurrentUser = Annotated[Account, Depends(get_rate_limited_user)]
 
 
 @router.post(
@@ -23,37 +27,49 @@ T_CurrentUser = Annotated[Account, Depends(get_current_user)]
     status_code=HTTPStatus.CREATED,
     response_model=AccountPublicSchema,
     name='Create an new Account User',
+    dependencies=[Depends(limit_signup)],
 )
-def create_user(user: AccountSchema, session: T_Session):
-    db_user = session.scalar(
-        select(Account).where(
-            (Account.username == user.username) | (Account.email == user.email)
-        )
+async def create_user(user: AccountSchema, session: T_Session):
+    username = sanitize_name(user.username)
+    email = sanitize_email(user.email)
+    conflict = exists().where(
+        Account.username.in_([user.username, username])
+        | Account.email.in_([user.email, email])
     )
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='Conta já consta no MADR',
-            )
-        elif db_user.email == user.email:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='Conta já consta no MADR',
-            )
-
-    hashed_password = get_password_hash(user.password)
+    # Cadastros repetidos são recusados por uma consulta indexada, antes de
+    # ocuparem o pool de hash com o Argon2
+    if await session.scalar(select(conflict)):
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Conta já consta no MADR',
+        )
 
-    db_user = Account(
-        username=sanitize_name(user.username),
-        email=sanitize_email(user.email),
-        password=hashed_password,
+    hashed_password = await password_hasher.hash(user.password)
+
+    # Entre a checagem e o INSERT outra requisição pode gravar a mesma conta;
+    # o NOT EXISTS e o ON CONFLICT continuam cobrindo essa corrida
+    db_user = await session.scalar(
+        insert(Account)
+        .from_select(
+            ['username', 'email', 'password'],
+            select(
+                literal(username),
+                literal(email),
+                literal(hashed_password),
+            ).where(~conflict),
+        )
+        .on_conflict_do_nothing()
+        .returning(Account)
     )
 
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    if not db_user:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Conta já consta no MADR',
+        )
+
+    await session.commit()
 
     return db_user
 
@@ -94,7 +110,7 @@ def create_user(user: AccountSchema, session: T_Session):
     response_model=AccountPublicSchema,
     name='Update an User Data',
 )
-def update_user(
+async def update_user(
     user_id: int,
     user: AccountSchema,
     session: T_Session,
@@ -106,14 +122,33 @@ def update_user(
             detail='Não autorizado',
         )
 
-    current_user.username = sanitize_name(user.username)
-    current_user.email = sanitize_email(user.email)
-    current_user.password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
+
+    try:
+        db_user = await session.scalar(
+            update(Account)
+            .where(Account.id == current_user.id)
+            .values(
+                username=sanitize_name(user.username),
+                email=sanitize_email(user.email),
+                password=hashed_password,
+                token_version=Account.token_version + 1,
+            )
+            .returning(Account)
+            .execution_options(populate_existing=True)
+        )
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Conta já consta no MADR',
+        )
+
+    await session.commit()
 
-    session.commit()
-    session.refresh(current_user)
+    principal_cache.invalidate(current_user.id)
 
-    return current_user
+    return db_user
 
 
 @router.delete(
@@ -121,7 +156,7 @@ def update_user(
     response_model=MessageSchema,
     name='Delete an User Account',
 )
-def delete_user(
+async def delete_user(
     user_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
@@ -132,7 +167,9 @@ def delete_user(
             detail='Não autorizado',
         )
 
-    session.delete(current_user)
-    session.commit()
+    await session.execute(delete(Account).where(Account.id == current_user.id))
+    await session.commit()
+
+    principal_cache.invalidate(current_user.id)
 
     return {'message': 'Conta deletada com sucesso'}
@@ -3,30 +3,39 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from madl.database import get_session
+from madl.hashing import password_hasher
 from madl.models import Account
-from madl.schemas.token_schema import Token
+from madl.rate_limit import limit_login
+from madl.revocation import token_denylist
+from madl.schemas.message_schema import MessageSchema
+from madl.schemas.token_schema import RevokeTokenSchema, Token
 from madl.security import (
     create_access_token,
+    decode_token,
     get_current_user,
-    verify_password,
+    oauth2_scheme,
 )
 
 router = APIRouter(prefix='/auth', tags=['Auth'])
 
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
-T_Session = Annotated[Session, Depends(get_session)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_CurrentUser = Annotated[Account, Depends(get_current_user)]
+T_Token = Annotated[str, Depends(oauth2_scheme)]
 
 
-@router.post('/token', response_model=Token)
-def login_for_access_token(
+@router.post(
+    '/token', response_model=Token, dependencies=[Depends(limit_login)]
+)
+async def login_for_access_token(
     form_data: T_OAuth2Form,
     session: T_Session,
 ):
-    user = session.scalar(
+    user = await session.scalar(
         select(Account).where(Account.email == form_data.username)
     )
 
@@ -36,21 +45,75 @@ def login_for_access_token(
             detail='Email ou senha incorretos',
         )
 
-    if not verify_password(form_data.password, user.password):
+    valid, updated_hash = await password_hasher.verify_and_update(
+        form_data.password, user.password
+    )
+
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Email ou senha incorretos',
         )
 
-    access_token = create_access_token(data={'sub': user.email})
+    # Regrava o hash com os custos atuais sem exigir troca de senha
+    if updated_hash:
+        await session.execute(
+            update(Account)
+            .where(Account.id == user.id)
+            .values(password=updated_hash)
+        )
+        await session.commit()
+
+    access_token = create_access_token(data={'sub': user.email}, account=user)
 
     return {'access_token': access_token, 'token_type': 'bearer'}
 
 
 @router.post('/refresh_token', response_model=Token)
-def refresh_access_token(
+async def refresh_access_token(
     user: Account = Depends(get_current_user),
 ):
-    new_access_token = create_access_token(data={'sub': user.email})
+    new_access_token = create_access_token(
+        data={'sub': user.email}, account=user
+    )
 
     return {'access_token': new_access_token, 'token_type': 'bearer'}
+
+
+@router.post('/logout', response_model=MessageSchema)
+async def logout(
+    session: T_Session,
+    token: T_Token,
+    user: T_CurrentUser,
+):
+    token_data = decode_token(token)
+
+    # Tokens emitidos antes da revogação existir não têm jti
+    if token_data.jti:
+        await token_denylist.revoke(
+            session, token_data.jti, token_data.expires_at
+        )
+
+    return {'message': 'Sessão encerrada'}
+
+
+@router.post('/revoke', response_model=MessageSchema)
+async def revoke_token(
+    payload: RevokeTokenSchema,
+    session: T_Session,
+    user: T_CurrentUser,
+):
+    token_data = decode_token(payload.token)
+
+    if token_data.username != user.email:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Token pertence a outra conta',
+        )
+
+    if token_data.jti:
+        await token_denylist.revoke(
+            session, token_data.jti, token_data.expires_at
+        )
+
+    return {'message': 'Token revogado'}
@@ -0,0 +1,69 @@
+from http import HTTPStatus
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.autocomplete import Autocomplete, autocomplete
+from madl.database import get_session
+from madl.schemas.autocomplete_schema import (
+    AutocompleteResponse,
+    SuggestionSchema,
+)
+from madl.serialization import (
+    MSGPACK_RESPONSES,
+    Layout,
+    negotiate_format,
+    negotiated_response,
+    to_columns,
+)
+
+router = APIRouter(prefix='/autocomplete', tags=['Search'])
+
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+
+
+async def get_autocomplete(session: T_Session):
+    # O índice é carregado na inicialização; se não foi, carrega no 1º uso
+    if not autocomplete.ready:
+        await autocomplete.build(session)
+    return autocomplete
+
+
+@router.get(
+    '',
+    status_code=HTTPStatus.OK,
+    response_model=AutocompleteResponse,
+    responses=MSGPACK_RESPONSES,
+    name='Suggest Books and Novelists by prefix',
+)
+async def suggest(  # noqa: PLR0913, PLR0917
+    request: Request,
+    q: Annotated[str, Query(min_length=1)],
+    index: Annotated[Autocomplete, Depends(get_autocomplete)],
+    kind: Literal['all', 'book', 'novelist'] = 'all',
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+    layout: Layout = 'rows',
+):
+    suggestions = []
+    if kind in {'all', 'book'}:
+        suggestions += [
+            {'kind': 'book', 'id': item_id, 'label': label}
+            for item_id, label in index.books.search(q, limit)
+        ]
+    if kind in {'all', 'novelist'}:
+        suggestions += [
+            {'kind': 'novelist', 'id': item_id, 'label': label}
+            for item_id, label in index.novelists.search(q, limit)
+        ]
+
+    suggestions.sort(key=lambda suggestion: suggestion['label'])
+
+    data = AutocompleteResponse.model_validate({
+        'suggestions': suggestions[:limit]
+    }).model_dump(mode='json')
+
+    if layout == 'columns':
+        data['suggestions'] = to_columns(data['suggestions'], SuggestionSchema)
+
+    return negotiated_response(data, negotiate_format(request))
@@ -1,25 +1,80 @@
 from http import HTTPStatus
-from typing import Annotated, Optional
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from madl.database import get_session
+from typing import Annotated, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.autocomplete import autocomplete
+from madl.bulk import BULK_MAX_ITEMS, BulkMode, BulkResult, bulk_status_code
+from madl.conditional import content_etag, is_not_modified, make_validators
+from madl.counting import CountStrategy, count_rows, query_key
+from madl.database import get_read_session, get_session
+from madl.export import ExportFormat, export_response
 from madl.models import Account, Book, Novelist
+from madl.pagination import paginate_keyset, paginate_offset
+from madl.rate_limit import get_rate_limited_user
+from madl.result_cache import result_cache
 from madl.schemas.book_schema import (
     BookPublicSchema,
     BookSchema,
     BookUpdateSchema,
     PaginatedBooksResponse,
 )
+from madl.schemas.bulk_schema import BulkResponse
+from madl.schemas.expand_schema import (
+    BookWithNovelistSchema,
+    PaginatedBooksWithNovelistResponse,
+)
 from madl.schemas.message_schema import MessageSchema
-from madl.security import get_current_user
+from madl.schemas.novelist_schema import NovelistPublicSchema
+from madl.serialization import (
+    MSGPACK_RESPONSES,
+    Layout,
+    embed,
+    embedded_columns,
+    negotiate_format,
+    negotiated_response,
+    only_fields,
+    parse_fields,
+    project_columns,
+    representation_headers,
+    row_dicts,
+    to_columns,
+)
+from madl.utils import escape_like
 
 router = APIRouter(prefix='/books', tags=['Books'])
 
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[Account, Depends(get_current_user)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+T_CurrentUser = Annotated[Account, Depends(get_rate_limited_user)]
+
+BOOK_ORDERINGS = {'id': [Book.id], 'title': [Book.title, Book.id]}
+
+
+def filter_books(title: Optional[str], year: Optional[str]):
+    query = select(Book)
+
+    if title:
+        query = query.filter(
+            Book.title.ilike(f'%{escape_like(title)}%', escape='\\')
+        )
+    if year:
+        query = query.filter(Book.year == year)
+
+    return query
 
 
 @router.post(
@@ -28,92 +83,316 @@ T_CurrentUser = Annotated[Account, Depends(get_current_user)]
     response_model=BookSchema,
     name='Create a new Book',
 )
-def create_book(
+async def create_book(
     book: BookSchema,
     session: T_Session,
     current_user: T_CurrentUser,
 ):
-    db_book = session.scalar(
-        select(Book).where(Book.title == book.title.lower())
-    )
-
-    if db_book:
-        raise HTTPException(
-            status_code=HTTPStatus.CONFLICT,
-            detail='Livro já consta no MADR',
+    title = book.title.lower()
+
+    # O INSERT só seleciona o romancista se ele existir e ignora títulos
+    # repetidos, então uma única instrução cobre os dois casos de erro
+    db_book = await session.scalar(
+        insert(Book)
+        .from_select(
+            ['year', 'title', 'novelist_id'],
+            select(literal(book.year), literal(title), Novelist.id).where(
+                Novelist.id == book.novelist_id
+            ),
         )
-
-    db_novelist = session.scalar(
-        select(Novelist).where(Novelist.id == book.novelist_id)
+        .on_conflict_do_nothing(index_elements=[Book.title])
+        .returning(Book)
     )
 
-    if not db_novelist:
+    if not db_book:
+        if await session.scalar(select(exists().where(Book.title == title))):
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail='Livro já consta no MADR',
+            )
+
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Romancista não encontrado',
         )
 
-    db_book = Book(
-        year=book.year, title=book.title.lower(), novelist_id=book.novelist_id
-    )
+    await session.commit()
 
-    session.add(db_book)
-    session.commit()
-    session.refresh(db_book)
+    result_cache.invalidate('books')
+    autocomplete.books.add(db_book.id, db_book.title, db_book.novelist_id)
 
     return db_book
 
 
+@router.post(
+    '/bulk',
+    status_code=HTTPStatus.CREATED,
+    response_model=BulkResponse,
+    response_model_exclude_none=True,
+    name='Create many Books at once',
+)
+async def create_books_bulk(
+    books: Annotated[
+        list[BookSchema], Body(min_length=1, max_length=BULK_MAX_ITEMS)
+    ],
+    session: T_Session,
+    current_user: T_CurrentUser,
+    response: Response,
+    mode: BulkMode = 'partial',
+):
+    result = BulkResult(len(books))
+    titles = [book.title.lower() for book in books]
+
+    existing_titles = set(
+        await session.scalars(select(Book.title).where(Book.title.in_(titles)))
+    )
+    existing_novelists = set(
+        await session.scalars(
+            select(Novelist.id).where(
+                Novelist.id.in_({book.novelist_id for book in books})
+            )
+        )
+    )
+
+    seen_titles = set()
+    for index, (book, title) in enumerate(zip(books, titles)):
+        if title in existing_titles:
+            result.fail(index, 'conflict', 'Livro já consta no MADR')
+        elif title in seen_titles:
+            result.fail(index, 'conflict', 'Livro repetido no lote')
+        elif book.novelist_id not in existing_novelists:
+            result.fail(index, 'not_found', 'Romancista não encontrado')
+        seen_titles.add(title)
+
+    pending = [] if mode == 'atomic' and result.failed else result.pending()
+
+    if pending:
+        inserted = await session.execute(
+            insert(Book)
+            .values([
+                {
+                    'year': books[index].year,
+                    'title': titles[index],
+                    'novelist_id': books[index].novelist_id,
+                }
+                for index in pending
+            ])
+            .on_conflict_do_nothing(index_elements=[Book.title])
+            .returning(Book.id, Book.title)
+        )
+        created = {title: book_id for book_id, title in inserted.tuples()}
+
+        # Títulos inseridos por outra requisição entre a checagem e o INSERT
+        for index in pending:
+            if titles[index] in created:
+                result.create(index, created[titles[index]])
+            else:
+                result.fail(index, 'conflict', 'Livro já consta no MADR')
+
+    if mode == 'atomic' and result.failed:
+        await session.rollback()
+        result.reject()
+    else:
+        await session.commit()
+        result_cache.invalidate('books')
+        for index, item in enumerate(result.results):
+            if item['status'] == 'created':
+                autocomplete.books.add(
+                    item['id'], titles[index], books[index].novelist_id
+                )
+
+    response.status_code = bulk_status_code(result)
+
+    return result.as_response()
+
+
 @router.get(
     '/list',
     status_code=HTTPStatus.OK,
-    response_model=PaginatedBooksResponse,
+    response_model=PaginatedBooksResponse | PaginatedBooksWithNovelistResponse,
+    response_model_exclude_unset=True,
+    responses=MSGPACK_RESPONSES,
     name='Read and list all Books',
 )
-def read_books(
-    session: T_Session,
+async def read_books(  # noqa: PLR0913, PLR0917
+    session: T_ReadSession,
+    request: Request,
     title: Optional[str] = None,
     year: Optional[str] = None,
-    page: int = 1,
-    per_page: int = 20,
+    page: Annotated[int, Query(ge=1)] = 1,
+    per_page: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None,
+    order_by: Literal['id', 'title'] = 'id',
+    count: CountStrategy = 'exact',
+    layout: Layout = 'rows',
+    fields: Optional[str] = None,
+    expand: Optional[Literal['novelist']] = None,
 ):
-    query = session.query(Book)
+    media_type = negotiate_format(request)
+    selected = parse_fields(fields, BookPublicSchema)
+    columns = BOOK_ORDERINGS[order_by]
+    projection = project_columns(Book, selected, columns)
+    count_query = filter_books(title, year).with_only_columns(*projection)
+    query, output_fields, tags = count_query, selected, {'books'}
+
+    # O romancista vem pelo JOIN da relação Book.novelist, na mesma consulta
+    # da página, sem uma requisição por livro
+    if expand == 'novelist':
+        query = count_query.join(Book.novelist).add_columns(
+            *embedded_columns(Novelist, NovelistPublicSchema, 'novelist')
+        )
+        output_fields = [*selected, 'novelist']
+        tags = {'books', 'novelists'}
+
+    async def load(session: AsyncSession):
+        # Sem cursor mantém a paginação por número de página
+        if cursor is None:
+            books, total_books, total_kind = await paginate_offset(
+                session, query, columns, page, per_page, count, count_query
+            )
+            pagination = {'page': page}
+        else:
+            total_books, total_kind = await count_rows(
+                session, count_query, 'exact' if count == 'window' else count
+            )
+            books, next_cursor, prev_cursor = await paginate_keyset(
+                session, query, columns, order_by, cursor, per_page
+            )
+            pagination = {
+                'next_cursor': next_cursor,
+                'prev_cursor': prev_cursor,
+            }
 
-    if title:
-        query = query.filter(Book.title.ilike(f'%{title}%'))
-    if year:
-        query = query.filter(Book.year == year)
+        if expand == 'novelist':
+            books = embed(books, NovelistPublicSchema, 'novelist')
 
-    total_books = query.count()
+        # Colunas lidas só para montar o cursor saem da resposta
+        if len(projection) > len(selected):
+            books = only_fields(books, output_fields)
 
-    query = query.offset((page - 1) * per_page).limit(per_page)
+        data = {
+            'books': books,
+            'total': total_books,
+            'per_page': per_page,
+            'total_pages': (total_books + per_page - 1) // per_page,
+        } | pagination
 
-    books = query.all()
+        return data, total_kind, content_etag(data)
 
-    return {
-        'books': books,
-        'total': total_books,
-        'page': page,
-        'per_page': per_page,
-        'total_pages': (total_books + per_page - 1) // per_page,
-    }
+    key = ('books', query_key(query), page, per_page, cursor, order_by, count)
+
+    # ETag e página saem da mesma carga: sem agregados sobre todo o filtro
+    data, total_kind, etag = await result_cache.get_or_load(
+        key, tags, session, load
+    )
+    headers = representation_headers(etag, None, media_type)
+
+    if is_not_modified(request, headers['ETag'], None):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    if layout == 'columns':
+        data = {
+            **data,
+            'books': to_columns(
+                data['books'], BookPublicSchema, output_fields
+            ),
+        }
+
+    # As linhas já saem no formato do schema, então a resposta dispensa a
+    # validação do response_model e vai direto para o serializador
+    return negotiated_response(
+        data, media_type, headers | {'X-Total-Kind': total_kind}
+    )
+
+
+@router.get(
+    '/export',
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+    name='Export all Books as NDJSON or CSV',
+)
+async def export_books(
+    session: T_ReadSession,
+    title: Optional[str] = None,
+    year: Optional[str] = None,
+    format: ExportFormat = 'ndjson',
+):
+    query = filter_books(title, year).order_by(Book.id)
+    return export_response(session, query, BookPublicSchema, format, 'books')
 
 
 @router.get(
     '/{book_id}',
     status_code=HTTPStatus.OK,
-    response_model=BookPublicSchema,
+    response_model=BookPublicSchema | BookWithNovelistSchema,
+    responses=MSGPACK_RESPONSES,
     name='Find one Book by id',
 )
-def read_one_book(book_id: int, session: T_Session):
-    book = session.scalar(select(Book).where((Book.id == book_id)))
+async def read_one_book(
+    book_id: int,
+    session: T_ReadSession,
+    request: Request,
+    fields: Optional[str] = None,
+    expand: Optional[Literal['novelist']] = None,
+):
+    media_type = negotiate_format(request)
+    selected = parse_fields(fields, BookPublicSchema)
+    last_modified_column = Book.updated_at
+    tags = {f'book:{book_id}'}
+    embedded = []
+
+    if expand == 'novelist':
+        embedded = embedded_columns(Novelist, NovelistPublicSchema, 'novelist')
+        last_modified_column = func.greatest(
+            Book.updated_at, Novelist.updated_at
+        )
+        tags.add('novelists')
+
+    # Os validadores vêm na mesma linha dos dados, em uma única consulta, e o
+    # romancista marca a entrada para que removê-lo também a descarte
+    query = select(
+        *project_columns(Book, selected),
+        *embedded,
+        last_modified_column.label('last_modified'),
+        Book.novelist_id.label('owner_id'),
+    ).where(Book.id == book_id)
+    if expand == 'novelist':
+        query = query.join(Book.novelist)
+
+    async def load(session: AsyncSession):
+        # Só as colunas pedidas em fields= são lidas do banco
+        rows = row_dicts(await session.execute(query))
+
+        if not rows:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail='Livro não consta no MADR',
+            )
 
-    if not book:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Livro não consta no MADR'
+        if expand == 'novelist':
+            rows = embed(rows, NovelistPublicSchema, 'novelist')
+
+        book = rows[0]
+        last_modified = book.pop('last_modified')
+        owner_id = book.pop('owner_id')
+        validators = make_validators(
+            last_modified, 'book', book_id, expand, *selected
         )
+        return book, *validators, owner_id
+
+    data, etag, last_modified, _ = await result_cache.get_or_load(
+        ('book', book_id, expand, *selected),
+        tags,
+        session,
+        load,
+        lambda value: [f'novelist:{value[-1]}'],
+    )
+    headers = representation_headers(etag, last_modified, media_type)
+
+    if is_not_modified(request, headers['ETag'], last_modified):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
 
-    return book
+    return negotiated_response(data, media_type, headers)
 
 
 @router.patch(
@@ -121,41 +400,64 @@ def read_one_book(book_id: int, session: T_Session):
     response_model=BookPublicSchema,
     name='Update a Book Data',
 )
-def patch_book(
+async def patch_book(
     book_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
     book: BookUpdateSchema,
 ):
-    db_book = session.scalar(select(Book).where(Book.id == book_id))
+    schema_values = {'year': 'string', 'title': 'string', 'novelist_id': 0}
 
-    if not db_book:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='Livro não consta no MADR'
-        )
+    if book.title:
+        book.title = book.title.lower()
 
-    schema_values = {'year': 'string', 'title': 'string', 'novelist_id': 0}
+    values = {
+        key: value
+        for key, value in book.model_dump(exclude_unset=True).items()
+        if value is not None and value != schema_values.get(key, None)
+    }
 
-    book.title = book.title.lower()
+    if values:
+        query = update(Book).where(Book.id == book_id)
+        if 'novelist_id' in values:
+            query = query.where(
+                exists().where(Novelist.id == values['novelist_id'])
+            )
 
-    if book.novelist_id:
-        db_novelist = session.scalar(
-            select(Novelist).where(Novelist.id == book.novelist_id)
-        )
+        try:
+            db_book = await session.scalar(
+                query
+                .values(**values)
+                .returning(Book)
+                .execution_options(populate_existing=True)
+            )
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail='Livro já consta no MADR',
+            )
+    else:
+        db_book = await session.scalar(select(Book).where(Book.id == book_id))
 
-        if not db_novelist:
+    if not db_book:
+        if not await session.scalar(
+            select(exists().where(Book.id == book_id))
+        ):
             raise HTTPException(
                 status_code=HTTPStatus.NOT_FOUND,
-                detail='Romancista não encontrado',
+                detail='Livro não consta no MADR',
             )
 
-    for key, value in book.model_dump(exclude_unset=True).items():
-        if value != schema_values.get(key, None):
-            setattr(db_book, key, value)
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail='Romancista não encontrado',
+        )
+
+    await session.commit()
 
-    session.add(db_book)
-    session.commit()
-    session.refresh(db_book)
+    result_cache.invalidate('books', f'book:{book_id}')
+    autocomplete.books.add(db_book.id, db_book.title, db_book.novelist_id)
 
     return db_book
 
@@ -165,19 +467,23 @@ def patch_book(
     response_model=MessageSchema,
     name='Delete one Book',
 )
-def delete_book(
+async def delete_book(
     book_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
 ):
-    book = session.scalar(select(Book).where(Book.id == book_id))
+    deleted_id = await session.scalar(
+        delete(Book).where(Book.id == book_id).returning(Book.id)
+    )
 
-    if not book:
+    if not deleted_id:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Livro não consta no MADR'
         )
 
-    session.delete(book)
-    session.commit()
+    await session.commit()
+
+    result_cache.invalidate('books', f'book:{book_id}')
+    autocomplete.books.remove(book_id)
 
     return {'message': 'Livro deletado no MADR'}
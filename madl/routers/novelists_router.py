@@ -1,12 +1,34 @@
 from http import HTTPStatus
-from typing import Annotated, Optional
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from madl.database import get_session
-from madl.models import Account, Novelist
+from typing import Annotated, Literal, Optional
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.autocomplete import autocomplete
+from madl.bulk import BULK_MAX_ITEMS, BulkMode, BulkResult, bulk_status_code
+from madl.conditional import content_etag, is_not_modified, make_validators
+from madl.counting import CountStrategy, count_rows, query_key
+from madl.database import get_read_session, get_session
+from madl.export import ExportFormat, export_response
+from madl.models import Account, Book, Novelist
+from madl.pagination import paginate_keyset, paginate_offset
+from madl.rate_limit import get_rate_limited_user
+from madl.result_cache import result_cache
+from madl.schemas.book_schema import BookPublicSchema
+from madl.schemas.bulk_schema import BulkResponse
+from madl.schemas.expand_schema import NovelistWithBooksSchema
 from madl.schemas.message_schema import MessageSchema
 from madl.schemas.novelist_schema import (
     NovelistPublicSchema,
@@ -14,13 +36,43 @@ from madl.schemas.novelist_schema import (
     NovelistUpdateSchema,
     PaginatedNovelistsResponse,
 )
-from madl.security import get_current_user
-from madl.utils import sanitize_name
+from madl.serialization import (
+    MSGPACK_RESPONSES,
+    Layout,
+    negotiate_format,
+    negotiated_response,
+    only_fields,
+    parse_fields,
+    project_columns,
+    representation_headers,
+    row_dicts,
+    to_columns,
+)
+from madl.utils import escape_like, sanitize_name
 
 router = APIRouter(prefix='/novelists', tags=['Novelists'])
 
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[Account, Depends(get_current_user)]
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+T_CurrentUser = Annotated[Account, Depends(get_rate_limited_user)]
+
+BOOK_COLUMNS = project_columns(Book, list(BookPublicSchema.model_fields))
+
+NOVELIST_ORDERINGS = {
+    'id': [Novelist.id],
+    'name': [Novelist.name, Novelist.id],
+}
+
+
+def filter_novelists(name: Optional[str]):
+    query = select(Novelist)
+
+    if name:
+        query = query.filter(
+            Novelist.name.ilike(f'%{escape_like(name)}%', escape='\\')
+        )
+
+    return query
 
 
 @router.post(
@@ -29,80 +81,291 @@ T_CurrentUser = Annotated[Account, Depends(get_current_user)]
     response_model=NovelistSchema,
     name='Create an new Novelist',
 )
-def create_novelist(
+async def create_novelist(
     novelist: NovelistSchema,
     session: T_Session,
     current_user: T_CurrentUser,
 ):
-    db_novelist = session.scalar(
-        select(Novelist).where(Novelist.name == sanitize_name(novelist.name))
+    db_novelist = await session.scalar(
+        insert(Novelist)
+        .values(name=sanitize_name(novelist.name))
+        .on_conflict_do_nothing(index_elements=[Novelist.name])
+        .returning(Novelist)
     )
 
-    if db_novelist:
+    if not db_novelist:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Romancista já consta no MADR',
         )
 
-    db_novelist = Novelist(name=sanitize_name(novelist.name))
+    await session.commit()
 
-    session.add(db_novelist)
-    session.commit()
-    session.refresh(db_novelist)
+    result_cache.invalidate('novelists')
+    autocomplete.novelists.add(db_novelist.id, db_novelist.name)
 
     return db_novelist
 
 
+@router.post(
+    '/bulk',
+    status_code=HTTPStatus.CREATED,
+    response_model=BulkResponse,
+    response_model_exclude_none=True,
+    name='Create many Novelists at once',
+)
+async def create_novelists_bulk(
+    novelists: Annotated[
+        list[NovelistSchema], Body(min_length=1, max_length=BULK_MAX_ITEMS)
+    ],
+    session: T_Session,
+    current_user: T_CurrentUser,
+    response: Response,
+    mode: BulkMode = 'partial',
+):
+    result = BulkResult(len(novelists))
+    names = [sanitize_name(novelist.name) for novelist in novelists]
+
+    existing_names = set(
+        await session.scalars(
+            select(Novelist.name).where(Novelist.name.in_(names))
+        )
+    )
+
+    seen_names = set()
+    for index, name in enumerate(names):
+        if name in existing_names:
+            result.fail(index, 'conflict', 'Romancista já consta no MADR')
+        elif name in seen_names:
+            result.fail(index, 'conflict', 'Romancista repetido no lote')
+        seen_names.add(name)
+
+    pending = [] if mode == 'atomic' and result.failed else result.pending()
+
+    if pending:
+        inserted = await session.execute(
+            insert(Novelist)
+            .values([{'name': names[index]} for index in pending])
+            .on_conflict_do_nothing(index_elements=[Novelist.name])
+            .returning(Novelist.id, Novelist.name)
+        )
+        created = {
+            name: novelist_id for novelist_id, name in inserted.tuples()
+        }
+
+        # Nomes inseridos por outra requisição entre a checagem e o INSERT
+        for index in pending:
+            if names[index] in created:
+                result.create(index, created[names[index]])
+            else:
+                result.fail(index, 'conflict', 'Romancista já consta no MADR')
+
+    if mode == 'atomic' and result.failed:
+        await session.rollback()
+        result.reject()
+    else:
+        await session.commit()
+        result_cache.invalidate('novelists')
+        for index, item in enumerate(result.results):
+            if item['status'] == 'created':
+                autocomplete.novelists.add(item['id'], names[index])
+
+    response.status_code = bulk_status_code(result)
+
+    return result.as_response()
+
+
 @router.get(
     '/list',
     status_code=HTTPStatus.OK,
     response_model=PaginatedNovelistsResponse,
+    response_model_exclude_unset=True,
+    responses=MSGPACK_RESPONSES,
     name='Read and list all Novelists',
 )
-def read_novelists(
-    session: T_Session,
+async def read_novelists(  # noqa: PLR0913, PLR0917
+    session: T_ReadSession,
+    request: Request,
     name: Optional[str] = None,
-    page: int = 1,
-    per_page: int = 20,
+    page: Annotated[int, Query(ge=1)] = 1,
+    per_page: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None,
+    order_by: Literal['id', 'name'] = 'id',
+    count: CountStrategy = 'exact',
+    layout: Layout = 'rows',
+    fields: Optional[str] = None,
 ):
-    query = session.query(Novelist)
+    media_type = negotiate_format(request)
+    selected = parse_fields(fields, NovelistPublicSchema)
+    columns = NOVELIST_ORDERINGS[order_by]
+    projection = project_columns(Novelist, selected, columns)
+    query = filter_novelists(name).with_only_columns(*projection)
+
+    async def load(session: AsyncSession):
+        # Sem cursor mantém a paginação por número de página
+        if cursor is None:
+            novelists, total_novelists, total_kind = await paginate_offset(
+                session, query, columns, page, per_page, count
+            )
+            pagination = {'page': page}
+        else:
+            total_novelists, total_kind = await count_rows(
+                session, query, 'exact' if count == 'window' else count
+            )
+            novelists, next_cursor, prev_cursor = await paginate_keyset(
+                session, query, columns, order_by, cursor, per_page
+            )
+            pagination = {
+                'next_cursor': next_cursor,
+                'prev_cursor': prev_cursor,
+            }
+
+        if len(projection) > len(selected):
+            novelists = only_fields(novelists, selected)
+
+        data = {
+            'novelists': novelists,
+            'total': total_novelists,
+            'per_page': per_page,
+            'total_pages': (total_novelists + per_page - 1) // per_page,
+        } | pagination
+
+        return data, total_kind, content_etag(data)
+
+    key = (
+        'novelists',
+        query_key(query),
+        page,
+        per_page,
+        cursor,
+        order_by,
+        count,
+    )
 
-    if name:
-        query = query.filter(Novelist.name.ilike(f'%{name}%'))
+    # ETag e página saem da mesma carga: sem agregados sobre todo o filtro
+    data, total_kind, etag = await result_cache.get_or_load(
+        key, {'novelists'}, session, load
+    )
+    headers = representation_headers(etag, None, media_type)
 
-    total_novelists = query.count()
+    if is_not_modified(request, headers['ETag'], None):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
 
-    query = query.offset((page - 1) * per_page).limit(per_page)
+    if layout == 'columns':
+        data = {
+            **data,
+            'novelists': to_columns(
+                data['novelists'], NovelistPublicSchema, selected
+            ),
+        }
 
-    novelists = query.all()
+    return negotiated_response(
+        data, media_type, headers | {'X-Total-Kind': total_kind}
+    )
 
-    return {
-        'novelists': novelists,
-        'total': total_novelists,
-        'page': page,
-        'per_page': per_page,
-        'total_pages': (total_novelists + per_page - 1) // per_page,
-    }
+
+@router.get(
+    '/export',
+    status_code=HTTPStatus.OK,
+    response_class=StreamingResponse,
+    name='Export all Novelists as NDJSON or CSV',
+)
+async def export_novelists(
+    session: T_ReadSession,
+    name: Optional[str] = None,
+    format: ExportFormat = 'ndjson',
+):
+    query = filter_novelists(name).order_by(Novelist.id)
+    return export_response(
+        session, query, NovelistPublicSchema, format, 'novelists'
+    )
 
 
 @router.get(
     '/{novelist_id}',
     status_code=HTTPStatus.OK,
-    response_model=NovelistPublicSchema,
+    response_model=NovelistPublicSchema | NovelistWithBooksSchema,
+    responses=MSGPACK_RESPONSES,
     name='Find one Novelist by id',
 )
-def read_one_novelist(novelist_id: int, session: T_Session):
-    novelist = session.scalar(
-        select(Novelist).where((Novelist.id == novelist_id))
-    )
+async def read_one_novelist(  # noqa: PLR0913, PLR0917
+    novelist_id: int,
+    session: T_ReadSession,
+    request: Request,
+    fields: Optional[str] = None,
+    expand: Optional[Literal['books']] = None,
+    page: Annotated[int, Query(ge=1)] = 1,
+    per_page: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    media_type = negotiate_format(request)
+    selected = parse_fields(fields, NovelistPublicSchema)
+    tags = {f'novelist:{novelist_id}'}
+    if expand == 'books':
+        tags.add('books')
+
+    async def load(session: AsyncSession):
+        # Só as colunas pedidas em fields= são lidas do banco, junto com o
+        # updated_at que dá origem aos validadores
+        rows = row_dicts(
+            await session.execute(
+                select(
+                    *project_columns(Novelist, selected),
+                    Novelist.updated_at.label('last_modified'),
+                ).where(Novelist.id == novelist_id)
+            )
+        )
 
-    if not novelist:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail='Romancista não consta no MADR',
+        if not rows:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail='Romancista não consta no MADR',
+            )
+
+        novelist = rows[0]
+        last_modified = novelist.pop('last_modified')
+
+        if expand != 'books':
+            return novelist, *make_validators(
+                last_modified, 'novelist', novelist_id, *selected
+            )
+
+        # Uma única consulta pela relação Novelist.books traz a página de
+        # livros e o total, pela função de janela
+        books, total_books, _ = await paginate_offset(
+            session,
+            select(*BOOK_COLUMNS)
+            .select_from(Novelist)
+            .join(Novelist.books)
+            .where(Novelist.id == novelist_id),
+            [Book.id],
+            page,
+            per_page,
+            'window',
         )
+        novelist['books'] = {
+            'books': books,
+            'total': total_books,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': (total_books + per_page - 1) // per_page,
+        }
+
+        # Livros removidos não deixam rastro em updated_at, então a página
+        # embutida só tem ETag, derivado do próprio conteúdo
+        return novelist, content_etag(novelist), None
+
+    data, etag, last_modified = await result_cache.get_or_load(
+        ('novelist', novelist_id, expand, page, per_page, *selected),
+        tags,
+        session,
+        load,
+    )
+    headers = representation_headers(etag, last_modified, media_type)
 
-    return novelist
+    if is_not_modified(request, headers['ETag'], last_modified):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    return negotiated_response(data, media_type, headers)
 
 
 @router.patch(
@@ -110,15 +373,42 @@ def read_one_novelist(novelist_id: int, session: T_Session):
     response_model=NovelistPublicSchema,
     name='Update an Novelist',
 )
-def patch_novelist(
+async def patch_novelist(
     novelist_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
     novelist: NovelistUpdateSchema,
 ):
-    db_novelist = session.scalar(
-        select(Novelist).where(Novelist.id == novelist_id)
-    )
+    schema_values = {'name': 'string'}
+
+    if novelist.name:
+        novelist.name = sanitize_name(novelist.name)
+
+    values = {
+        key: value
+        for key, value in novelist.model_dump(exclude_unset=True).items()
+        if value is not None and value != schema_values.get(key, None)
+    }
+
+    if values:
+        try:
+            db_novelist = await session.scalar(
+                update(Novelist)
+                .where(Novelist.id == novelist_id)
+                .values(**values)
+                .returning(Novelist)
+                .execution_options(populate_existing=True)
+            )
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail='Romancista já consta no MADR',
+            )
+    else:
+        db_novelist = await session.scalar(
+            select(Novelist).where(Novelist.id == novelist_id)
+        )
 
     if not db_novelist:
         raise HTTPException(
@@ -126,18 +416,10 @@ def patch_novelist(
             detail='Romancista não consta no MADR',
         )
 
-    schema_values = {'name': 'string'}
-
-    novelist.name = sanitize_name(novelist.name)
+    await session.commit()
 
-    for key, value in novelist.model_dump(exclude_unset=True).items():
-        # Verifica se o valor não é igual ao valor padrão do schema
-        if value != schema_values.get(key, None):
-            setattr(db_novelist, key, value)
-
-    session.add(db_novelist)
-    session.commit()
-    session.refresh(db_novelist)
+    result_cache.invalidate('novelists', f'novelist:{novelist_id}')
+    autocomplete.novelists.add(db_novelist.id, db_novelist.name)
 
     return db_novelist
 
@@ -147,22 +429,30 @@ def patch_novelist(
     response_model=MessageSchema,
     name='Delete an Novelist',
 )
-def delete_novelist(
+async def delete_novelist(
     novelist_id: int,
     session: T_Session,
     current_user: T_CurrentUser,
 ):
-    novelist = session.scalar(
-        select(Novelist).where(Novelist.id == novelist_id)
+    # Os livros são removidos pelo ON DELETE CASCADE do próprio banco
+    deleted_id = await session.scalar(
+        delete(Novelist)
+        .where(Novelist.id == novelist_id)
+        .returning(Novelist.id)
     )
 
-    if not novelist:
+    if not deleted_id:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Romancista não consta no MADR',
         )
 
-    session.delete(novelist)
-    session.commit()
+    await session.commit()
+
+    # As leituras de cada livro levam a tag do romancista, então nada aqui
+    # cresce com a quantidade de livros removidos
+    result_cache.invalidate('novelists', f'novelist:{novelist_id}', 'books')
+    autocomplete.novelists.remove(novelist_id)
+    autocomplete.books.remove_group(novelist_id)
 
     return {'message': 'Romancista deletado no MADR'}
@@ -0,0 +1,106 @@
+from http import HTTPStatus
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import REAL, and_, cast, func, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from madl.database import get_read_session
+from madl.models import TEXT_SEARCH_CONFIG, Book, Novelist
+from madl.pagination import decode_cursor, encode_cursor
+from madl.schemas.search_schema import SearchResponse, SearchResultSchema
+from madl.serialization import (
+    MSGPACK_RESPONSES,
+    Layout,
+    negotiate_format,
+    negotiated_response,
+    to_columns,
+)
+
+router = APIRouter(prefix='/search', tags=['Search'])
+
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+def ranked_matches(model, label, kind: str, tsquery):
+    return select(
+        literal(kind).label('kind'),
+        model.id.label('id'),
+        label.label('label'),
+        func.ts_rank_cd(model.search_vector, tsquery, type_=REAL).label(
+            'rank'
+        ),
+    ).where(model.search_vector.bool_op('@@')(tsquery))
+
+
+@router.get(
+    '',
+    status_code=HTTPStatus.OK,
+    response_model=SearchResponse,
+    responses=MSGPACK_RESPONSES,
+    name='Search Books and Novelists',
+)
+async def search(  # noqa: PLR0913, PLR0917
+    session: T_ReadSession,
+    request: Request,
+    q: Annotated[str, Query(min_length=1)],
+    kind: Literal['all', 'book', 'novelist'] = 'all',
+    per_page: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str = '',
+    layout: Layout = 'rows',
+):
+    tsquery = func.websearch_to_tsquery(cast(TEXT_SEARCH_CONFIG, REGCONFIG), q)
+
+    matches = []
+    if kind in {'all', 'book'}:
+        matches.append(ranked_matches(Book, Book.title, 'book', tsquery))
+    if kind in {'all', 'novelist'}:
+        matches.append(
+            ranked_matches(Novelist, Novelist.name, 'novelist', tsquery)
+        )
+
+    results = matches[0].union_all(*matches[1:]).subquery()
+    columns = [results.c.rank, results.c.kind, results.c.id]
+
+    query = select(results)
+
+    # Ordena por relevância decrescente, desempatando por tipo e id
+    _, key = decode_cursor(cursor, kind, columns)
+    if key is not None:
+        rank, *tiebreak = key
+        last_rank = cast(rank, REAL)
+        query = query.where(
+            or_(
+                results.c.rank < last_rank,
+                and_(
+                    results.c.rank == last_rank,
+                    tuple_(results.c.kind, results.c.id) > tuple_(*tiebreak),
+                ),
+            )
+        )
+
+    query = query.order_by(
+        results.c.rank.desc(), results.c.kind, results.c.id
+    ).limit(per_page + 1)
+
+    rows = (await session.execute(query)).mappings().all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            kind, 'next', [last['rank'], last['kind'], last['id']]
+        )
+
+    data = SearchResponse.model_validate({
+        'results': rows,
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+    }).model_dump(mode='json')
+
+    if layout == 'columns':
+        data['results'] = to_columns(data['results'], SearchResultSchema)
+
+    return negotiated_response(data, negotiate_format(request))
@@ -0,0 +1,13 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class SuggestionSchema(BaseModel):
+    kind: Literal['book', 'novelist']
+    id: int
+    label: str
+
+
+class AutocompleteResponse(BaseModel):
+    suggestions: list[SuggestionSchema]
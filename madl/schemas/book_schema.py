@@ -21,9 +21,11 @@ class BookPublicSchema(BaseModel):
 class PaginatedBooksResponse(BaseModel):
     books: list[BookPublicSchema]
     total: int
-    page: int
+    page: int | None = None
     per_page: int
     total_pages: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 
 class BookUpdateSchema(BaseModel):
@@ -0,0 +1,16 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class BulkItemResultSchema(BaseModel):
+    index: int
+    status: Literal['created', 'conflict', 'not_found', 'skipped']
+    id: int | None = None
+    detail: str | None = None
+
+
+class BulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkItemResultSchema]
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class ResultCacheStatsSchema(BaseModel):
+    entries: int
+    size_bytes: int
+    hits: int
+    stale_hits: int
+    misses: int
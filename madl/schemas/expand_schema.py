@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+
+from madl.schemas.book_schema import BookPublicSchema, PaginatedBooksResponse
+from madl.schemas.novelist_schema import NovelistPublicSchema
+
+
+class BookWithNovelistSchema(BookPublicSchema):
+    novelist: NovelistPublicSchema
+
+
+class PaginatedBooksWithNovelistResponse(PaginatedBooksResponse):
+    books: list[BookWithNovelistSchema]
+
+
+class NovelistBooksPage(BaseModel):
+    books: list[BookPublicSchema]
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+
+
+class NovelistWithBooksSchema(NovelistPublicSchema):
+    books: NovelistBooksPage
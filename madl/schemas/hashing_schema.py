@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class HashingStatsSchema(BaseModel):
+    workers: int
+    pending: int
+    max_pending: int
+    completed: int
+    rejected: int
+    timeouts: int
+    latency_avg_ms: float
+    latency_max_ms: float
@@ -17,9 +17,11 @@ class NovelistPublicSchema(BaseModel):
 class PaginatedNovelistsResponse(BaseModel):
     novelists: list[NovelistPublicSchema]
     total: int
-    page: int
+    page: int | None = None
     per_page: int
     total_pages: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 
 class NovelistUpdateSchema(BaseModel):
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class PoolStatsSchema(BaseModel):
+    pool_size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    connections_opened: int
+    connections_closed: int
+    connections_invalidated: int
+    checkouts: int
+    checkins: int
+    checkout_timeouts: int
+    checkout_wait_avg_ms: float
+    checkout_wait_max_ms: float
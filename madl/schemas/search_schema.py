@@ -0,0 +1,16 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class SearchResultSchema(BaseModel):
+    kind: Literal['book', 'novelist']
+    id: int
+    label: str
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    results: list[SearchResultSchema]
+    per_page: int
+    next_cursor: str | None = None
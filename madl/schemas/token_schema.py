@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -8,3 +10,11 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: str | None = None
+    account_id: int | None = None
+    token_version: int | None = None
+    jti: str | None = None
+    expires_at: datetime | None = None
+
+
+class RevokeTokenSchema(BaseModel):
+    token: str
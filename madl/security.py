@@ -1,32 +1,35 @@
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from uuid import uuid4
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
-from pwdlib import PasswordHash
+from pydantic import ValidationError
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from zoneinfo import ZoneInfo
 
 from madl.database import get_session
 from madl.models import Account
+from madl.principals import principal_cache
+from madl.revocation import token_denylist
 from madl.schemas.token_schema import TokenData
 from madl.settings import Settings
 
 settings = Settings()
 
-pwd_context = PasswordHash.recommended()
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
-def create_access_token(data: dict):
+def create_access_token(data: dict, account: Account | None = None):
     to_encode = data.copy()
+    if account is not None and settings.ACCESS_TOKEN_ACCOUNT_CLAIMS:
+        to_encode.update({'uid': account.id, 'ver': account.token_version})
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({'exp': expire})
+    to_encode.update({'exp': expire, 'jti': uuid4().hex})
     encoded_jwt = encode(
         to_encode,
         settings.SECRET_KEY,
@@ -35,24 +38,17 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_current_user(
-    session: Session = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
-):
-    credentials_exception = HTTPException(
+def credentials_error() -> HTTPException:
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
+
+def decode_token(token: str) -> TokenData:
+    credentials_exception = credentials_error()
+
     try:
         payload = decode(
             token,
@@ -62,7 +58,13 @@ def get_current_user(
         username: str = payload.get('sub')
         if not username:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        return TokenData(
+            username=username,
+            account_id=payload.get('uid'),
+            token_version=payload.get('ver'),
+            jti=payload.get('jti'),
+            expires_at=payload.get('exp'),
+        )
 
     except DecodeError:
         raise credentials_exception
@@ -70,11 +72,50 @@ def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    user = session.scalar(
-        select(Account).where(Account.email == token_data.username)
-    )
+    except ValidationError:
+        raise credentials_exception
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    credentials_exception = credentials_error()
+    token_data = decode_token(token)
+
+    if token_data.jti and await token_denylist.is_revoked(
+        session, token_data.jti
+    ):
+        raise credentials_exception
+
+    # Com id e versão no token a conta é buscada pela chave primária
+    if token_data.account_id is not None:
+        key = ('uid', token_data.account_id)
+    else:
+        key = ('sub', token_data.username)
+
+    await principal_cache.sync(session)
+    user = principal_cache.get(key)
 
     if not user:
+        if token_data.account_id is not None:
+            user = await session.get(Account, token_data.account_id)
+        else:
+            user = await session.scalar(
+                select(Account).where(Account.email == token_data.username)
+            )
+
+        if not user:
+            raise credentials_exception
+
+        # Fora da sessão a conta não expira num rollback da requisição
+        session.expunge(user)
+        principal_cache.set(key, user)
+
+    if (
+        token_data.token_version is not None
+        and token_data.token_version != user.token_version
+    ):
         raise credentials_exception
 
     return user
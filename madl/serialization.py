@@ -0,0 +1,161 @@
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Literal
+
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import Label, Result
+from sqlalchemy.orm import InstrumentedAttribute
+
+from madl.conditional import validator_headers
+
+Layout = Literal['rows', 'columns']
+
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+ACCEPTED_MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    'application/*': JSON_MEDIA_TYPE,
+    '*/*': JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    'application/x-msgpack': MSGPACK_MEDIA_TYPE,
+    'application/vnd.msgpack': MSGPACK_MEDIA_TYPE,
+}
+
+# Documenta no OpenAPI o formato alternativo das rotas de leitura
+MSGPACK_RESPONSES = {HTTPStatus.OK: {'content': {MSGPACK_MEDIA_TYPE: {}}}}
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> list[str]:
+    # Sem fields= a resposta traz todos os campos do schema, na ordem dele
+    available = list(schema.model_fields)
+    if not fields:
+        return available
+
+    requested = {field.strip() for field in fields.split(',')} - {''}
+    unknown = requested - set(available)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f'Campos inválidos: {", ".join(sorted(unknown))}',
+        )
+
+    return [field for field in available if field in requested]
+
+
+def project_columns(
+    model: type,
+    fields: list[str],
+    extra: list[InstrumentedAttribute] | None = None,
+) -> list[InstrumentedAttribute]:
+    # O SELECT traz só os campos pedidos, além das colunas extras de que a
+    # consulta precisa, como as de ordenação usadas no cursor
+    keys = fields + [
+        column.key for column in extra or [] if column.key not in fields
+    ]
+    return [getattr(model, key) for key in keys]
+
+
+def embedded_columns(
+    model: type, schema: type[BaseModel], name: str
+) -> list[Label]:
+    # A entidade relacionada vem no mesmo SELECT, com as colunas prefixadas
+    return [
+        getattr(model, field).label(f'{name}__{field}')
+        for field in schema.model_fields
+    ]
+
+
+def embed(rows: list[dict], schema: type[BaseModel], name: str) -> list[dict]:
+    for row in rows:
+        row[name] = {
+            field: row.pop(f'{name}__{field}') for field in schema.model_fields
+        }
+    return rows
+
+
+def only_fields(rows: list[dict], fields: list[str]) -> list[dict]:
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+def row_dicts(result: Result) -> list[dict]:
+    # Monta as linhas direto das tuplas do SQL, sem entidades ORM nem uma
+    # segunda validação do Pydantic; o orjson serializa as datas
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def to_columns(
+    rows: list[dict],
+    schema: type[BaseModel],
+    fields: list[str] | None = None,
+) -> dict[str, list]:
+    # Cada campo vira uma lista, então as chaves não se repetem por linha
+    return {
+        field: [row[field] for row in rows]
+        for field in fields or schema.model_fields
+    }
+
+
+def negotiate_format(request: Request) -> str:
+    weights = {}
+    for item in request.headers.get('accept', '').split(','):
+        media_type, *params = item.split(';')
+        media_type = ACCEPTED_MEDIA_TYPES.get(media_type.strip().lower())
+        if media_type is None:
+            continue
+
+        weight = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[media_type] = max(weight, weights.get(media_type, 0.0))
+
+    # Em caso de empate, ou sem Accept reconhecido, o JSON é o padrão
+    if weights.get(MSGPACK_MEDIA_TYPE, 0.0) > weights.get(
+        JSON_MEDIA_TYPE, 0.0
+    ):
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def representation_headers(
+    etag: str, last_modified: str | None, media_type: str
+) -> dict:
+    # Cada formato é uma representação distinta da mesma URL e precisa de
+    # um ETag próprio
+    if media_type != JSON_MEDIA_TYPE:
+        etag = f'{etag[:-1]}-msgpack"'
+    return validator_headers(etag, last_modified) | {'Vary': 'Accept'}
+
+
+def encode_msgpack(value: Any):
+    # Datas seguem o mesmo formato ISO 8601 usado no JSON
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(value).__name__}')
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:  # noqa: PLR6301
+        return msgpack.packb(content, default=encode_msgpack)
+
+
+def negotiated_response(
+    content: Any, media_type: str, headers: dict | None = None
+) -> Response:
+    response_class = (
+        MsgPackResponse if media_type == MSGPACK_MEDIA_TYPE else ORJSONResponse
+    )
+    return response_class(
+        content, headers={'Vary': 'Accept'} | (headers or {})
+    )
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,3 +12,61 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    ACCESS_TOKEN_ACCOUNT_CLAIMS: bool = True
+
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+
+    INTERNAL_METRICS_ENABLED: bool = False
+
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_MAX_LAG: float = 5.0
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 5.0
+    DATABASE_REPLICA_CHECK_TIMEOUT: float = 1.0
+
+    COUNT_CACHE_TTL: float = 30.0
+    COUNT_CACHE_MAX_ENTRIES: int = 1024
+
+    AUTOCOMPLETE_PRELOAD: bool = True
+
+    BULK_MAX_ITEMS: int = 1000
+
+    EXPORT_BATCH_SIZE: int = 1000
+
+    RESULT_CACHE_TTL: float = 5.0
+    RESULT_CACHE_STALE_TTL: float = 30.0
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    PRINCIPAL_CACHE_TTL: float = 60.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 1024
+    PRINCIPAL_CACHE_SYNC_INTERVAL: float = 2.0
+
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_TIMEOUT: float = 5.0
+
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    RATE_LIMIT_BACKEND: Literal['memory', 'database'] = 'memory'
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    RATE_LIMIT_LOGIN_PER_IP: str = '20/60'
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: str = '5/60'
+    RATE_LIMIT_SIGNUP_PER_IP: str = '5/60'
+    RATE_LIMIT_WRITES_PER_ACCOUNT: str = '120/60'
+
+    TOKEN_DENYLIST_CAPACITY: int = 100_000
+    TOKEN_DENYLIST_ERROR_RATE: float = 0.01
+    TOKEN_DENYLIST_SYNC_INTERVAL: float = 5.0
+    TOKEN_DENYLIST_REBUILD_INTERVAL: float = 3600.0
+
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_THREAD_SIZE: int = 1024 * 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
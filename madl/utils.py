@@ -47,3 +47,12 @@ def sanitize_email(email: str) -> str:
     sanitized_email = f'{local_part}@{domain_part}'
 
     return sanitized_email
+
+
+def escape_like(value: str, escape: str = '\\') -> str:
+    # Trata % e _ digitados pelo usuário como texto e não como curingas
+    return (
+        value.replace(escape, escape * 2)
+        .replace('%', f'{escape}%')
+        .replace('_', f'{escape}_')
+    )
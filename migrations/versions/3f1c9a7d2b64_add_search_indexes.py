@@ -0,0 +1,69 @@
+"""add trigram search indexes and books.novelist_id index
+
+Revision ID: 3f1c9a7d2b64
+Revises: 8ad24bf94a90
+Create Date: 2026-10-17 10:12:31.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '8ad24bf94a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CONCURRENTLY evita bloquear escritas enquanto os índices são criados,
+    # mas não pode rodar dentro de uma transação
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_books_novelist_id'),
+            'books',
+            ['novelist_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_title_trgm',
+            'books',
+            ['title'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_novelists_name_trgm',
+            'novelists',
+            ['name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_novelists_name_trgm',
+            table_name='novelists',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_books_title_trgm',
+            table_name='books',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f('ix_books_novelist_id'),
+            table_name='books',
+            postgresql_concurrently=True,
+        )
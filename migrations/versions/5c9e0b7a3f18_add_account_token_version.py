@@ -0,0 +1,31 @@
+"""add account token version
+
+Revision ID: 5c9e0b7a3f18
+Revises: d41f8e2a6c37
+Create Date: 2026-10-17 16:02:45.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c9e0b7a3f18'
+down_revision: Union[str, None] = 'd41f8e2a6c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'accounts',
+        sa.Column(
+            'token_version', sa.Integer(), server_default='0', nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('accounts', 'token_version')
@@ -0,0 +1,77 @@
+"""add full text search vectors
+
+Revision ID: b7e2d41c9f05
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-17 11:03:52.774019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d41c9f05'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_ts_config WHERE cfgname = 'madl'
+            ) THEN
+                CREATE TEXT SEARCH CONFIGURATION madl (COPY = simple);
+                ALTER TEXT SEARCH CONFIGURATION madl
+                    ALTER MAPPING FOR hword, hword_part, word
+                    WITH unaccent, simple;
+            END IF;
+        END
+        $$
+        """
+    )
+    op.add_column('books', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('madl'::regconfig, title)", persisted=True),
+        nullable=False,
+    ))
+    op.add_column('novelists', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('madl'::regconfig, name)", persisted=True),
+        nullable=False,
+    ))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_search_vector',
+            'books',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_novelists_search_vector',
+            'novelists',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_novelists_search_vector', table_name='novelists')
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_column('novelists', 'search_vector')
+    op.drop_column('books', 'search_vector')
+    op.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS madl')
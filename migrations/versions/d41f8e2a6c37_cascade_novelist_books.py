@@ -0,0 +1,44 @@
+"""cascade novelist books on delete
+
+Revision ID: d41f8e2a6c37
+Revises: b7e2d41c9f05
+Create Date: 2026-10-17 14:21:07.318452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f8e2a6c37'
+down_revision: Union[str, None] = 'b7e2d41c9f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint(
+        'books_novelist_id_fkey', 'books', type_='foreignkey'
+    )
+    op.create_foreign_key(
+        'books_novelist_id_fkey',
+        'books',
+        'novelists',
+        ['novelist_id'],
+        ['id'],
+        ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'books_novelist_id_fkey', 'books', type_='foreignkey'
+    )
+    op.create_foreign_key(
+        'books_novelist_id_fkey',
+        'books',
+        'novelists',
+        ['novelist_id'],
+        ['id'],
+    )
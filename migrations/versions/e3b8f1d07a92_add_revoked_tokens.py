@@ -0,0 +1,46 @@
+"""add revoked tokens
+
+Revision ID: e3b8f1d07a92
+Revises: 9a4d6c2e8b51
+Create Date: 2026-10-17 18:55:03.214870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8f1d07a92'
+down_revision: Union[str, None] = '9a4d6c2e8b51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('jti', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            'revoked_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    op.create_index(
+        op.f('ix_revoked_tokens_expires_at'),
+        'revoked_tokens',
+        ['expires_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f('ix_revoked_tokens_expires_at'), table_name='revoked_tokens'
+    )
+    op.drop_table('revoked_tokens')
@@ -0,0 +1,66 @@
+import json
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from madl.schemas.book_schema import BookPublicSchema, PaginatedBooksResponse
+
+# Compara o caminho antigo da listagem de livros com o caminho via orjson,
+# sem banco: execute com python misc/serialization-benchmark.py
+PER_PAGE = 100
+ROUNDS = 2000
+
+now = datetime.now()
+rows = [
+    (index, '2024', f'livro numero {index}', 1, now, now)
+    for index in range(1, PER_PAGE + 1)
+]
+fields = list(BookPublicSchema.model_fields)
+
+
+def page(books):
+    return {
+        'books': books,
+        'total': PER_PAGE,
+        'page': 1,
+        'per_page': PER_PAGE,
+        'total_pages': 1,
+    }
+
+
+def old_path():
+    # Entidades ORM validadas no cache, revalidadas pelo response_model e
+    # codificadas com jsonable_encoder e json da biblioteca padrão
+    books = [SimpleNamespace(**dict(zip(fields, row))) for row in rows]
+    data = PaginatedBooksResponse.model_validate(
+        page(books), from_attributes=True
+    ).model_dump(mode='json', exclude_unset=True)
+    content = jsonable_encoder(
+        PaginatedBooksResponse.model_validate(data), exclude_unset=True
+    )
+    return json.dumps(content, ensure_ascii=False).encode()
+
+
+def new_path():
+    # Linhas do SQL viram dicionários e seguem direto para o orjson
+    books = [dict(zip(fields, row)) for row in rows]
+    return orjson.dumps(page(books))
+
+
+def main():
+    assert json.loads(old_path()) == json.loads(new_path())
+
+    old = timeit.timeit(old_path, number=ROUNDS) / ROUNDS
+    new = timeit.timeit(new_path, number=ROUNDS) / ROUNDS
+
+    print(f'Página com {PER_PAGE} livros, média de {ROUNDS} rodadas')
+    print(f'Pydantic + json: {old * 1e6:8.1f} µs')
+    print(f'Tuplas + orjson: {new * 1e6:8.1f} µs')
+    print(f'Ganho: {old / new:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,20 @@
 import factory
 import pytest
+import pytest_asyncio
 from faker import Faker
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
 from madl.app import app
-from madl.database import get_session
+from madl.autocomplete import autocomplete
+from madl.database import get_read_session, get_session, settings
+from madl.hashing import get_password_hash, password_hasher
 from madl.models import Account, Book, Novelist, table_registry
-from madl.security import get_password_hash
+from madl.principals import principal_cache
+from madl.rate_limit import MemoryBackend, rate_limiter
+from madl.result_cache import result_cache
+from madl.revocation import token_denylist
 
 fake = Faker()
 
@@ -47,41 +52,54 @@ class NovelistFactory(factory.Factory):
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
-        _engine = create_engine(postgres.get_connection_url())
-        with _engine.begin():
-            yield _engine
+        _engine = create_async_engine(postgres.get_connection_url())
+        yield _engine
 
 
 @pytest.fixture
-def client(session):
+def client(session, monkeypatch):
     def get_session_override():
         return session
 
+    # O índice de autocomplete é montado a partir da sessão de teste
+    monkeypatch.setattr(settings, 'AUTOCOMPLETE_PRELOAD', False)
+    # Sem processos dedicados o hash roda no threadpool do próprio teste
+    monkeypatch.setattr(password_hasher, 'workers', 0)
+    autocomplete.reset()
+    result_cache.clear()
+    principal_cache.clear()
+    token_denylist.reset()
+    monkeypatch.setattr(rate_limiter, 'backend', MemoryBackend(1024))
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def session(engine):
-    table_registry.metadata.create_all(engine)
-    with Session(engine) as session:
+@pytest_asyncio.fixture
+async def session(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
-        session.rollback()
+        await session.rollback()
 
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
 
 
-@pytest.fixture
-def user(session):
+@pytest_asyncio.fixture
+async def user(session):
     password = 'tester'
     user = UserFactory(password=get_password_hash(password))
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     # Um 'monkey patch' para os testes
     # não testarem em um hash, mas sim uma senha em texto
@@ -90,14 +108,14 @@ def user(session):
     return user
 
 
-@pytest.fixture
-def other_user(session):
+@pytest_asyncio.fixture
+async def other_user(session):
     password = 'tester'
     user = UserFactory(password=get_password_hash(password))
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = 'tester'
 
@@ -113,19 +131,19 @@ def token(client, user):
     return response.json()['access_token']
 
 
-@pytest.fixture
-def book(session):
+@pytest_asyncio.fixture
+async def book(session):
     book = BookFactory()
     session.add(book)
-    session.commit()
-    session.refresh(book)
+    await session.commit()
+    await session.refresh(book)
     return book
 
 
-@pytest.fixture
-def novelist(session):
+@pytest_asyncio.fixture
+async def novelist(session):
     writter = NovelistFactory()
     session.add(writter)
-    session.commit()
-    session.refresh(writter)
+    await session.commit()
+    await session.refresh(writter)
     return writter
@@ -3,6 +3,7 @@ from http import HTTPStatus
 from fastapi.testclient import TestClient
 
 from madl.app import app
+from madl.database import settings
 
 
 def test_root_must_returns_message():
@@ -12,3 +13,23 @@ def test_root_must_returns_message():
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'MADR Online!'}
+
+
+def test_internal_metrics_are_disabled_by_default():
+    client = TestClient(app)
+
+    for path in ['/internal/pool', '/internal/hashing', '/internal/cache']:
+        assert client.get(path).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_pool_stats_must_returns_pool_metrics(monkeypatch):
+    monkeypatch.setattr(settings, 'INTERNAL_METRICS_ENABLED', True)
+    client = TestClient(app)
+
+    response = client.get('/internal/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['pool_size'] == settings.DATABASE_POOL_SIZE
+    assert {'checked_out', 'idle', 'overflow', 'checkout_wait_avg_ms'} <= set(
+        response.json()
+    )
@@ -0,0 +1,34 @@
+from madl.calibrate import calibrate, write_env
+
+
+def fake_measure(time_cost, memory_cost, parallelism):
+    # 10 ms por iteração para cada 64 MiB
+    return time_cost * memory_cost / 65536 * 0.01
+
+
+def test_calibrate_keeps_memory_and_raises_iterations():
+    values = calibrate(0.045, 65536, 4, measure=fake_measure)
+
+    assert values == {
+        'ARGON2_TIME_COST': 4,
+        'ARGON2_MEMORY_COST': 65536,
+        'ARGON2_PARALLELISM': 4,
+    }
+
+
+def test_calibrate_lowers_memory_when_one_pass_is_too_slow():
+    values = calibrate(0.006, 262144, 2, measure=fake_measure)
+
+    assert values['ARGON2_MEMORY_COST'] == 32768  # noqa: PLR2004
+    assert values['ARGON2_TIME_COST'] == 1
+
+
+def test_write_env_replaces_and_appends_keys(tmp_path):
+    env = tmp_path / '.env'
+    env.write_text("SECRET_KEY='x'\nARGON2_TIME_COST=3\n", encoding='utf-8')
+
+    write_env(env, {'ARGON2_TIME_COST': 5, 'ARGON2_MEMORY_COST': 32768})
+
+    assert env.read_text(encoding='utf-8') == (
+        "SECRET_KEY='x'\nARGON2_TIME_COST=5\nARGON2_MEMORY_COST=32768\n"
+    )
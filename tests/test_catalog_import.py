@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from madl.catalog_import import import_catalog, main
+from madl.models import Book, Novelist
+
+
+@pytest.fixture
+def database_url(engine):
+    return engine.url.render_as_string(hide_password=False)
+
+
+@pytest.mark.asyncio
+async def test_import_csv_creating_novelists(
+    session, database_url, tmp_path, capsys
+):
+    catalog = tmp_path / 'catalog.csv'
+    catalog.write_text(
+        'title,year,novelist\n'
+        'Dom Casmurro,1899,Machado de Assis\n'
+        'Quincas Borba,1891,MACHADO DE ASSIS\n'
+        'dom casmurro,1899,Machado de Assis\n'
+        ',1900,Sem Título\n',
+        encoding='utf-8',
+    )
+
+    main([
+        str(catalog),
+        '--create-novelists',
+        '--batch-size',
+        '2',
+        '--database-url',
+        database_url,
+    ])
+
+    output = capsys.readouterr().out
+    assert 'lidas=4 inseridas=2 duplicadas=1 sem_romancista=0' in output
+
+    novelists = (await session.scalars(select(Novelist.name))).all()
+    titles = (await session.scalars(select(Book.title))).all()
+    assert novelists == ['machado de assis']
+    assert sorted(titles) == ['dom casmurro', 'quincas borba']
+
+
+@pytest.mark.asyncio
+async def test_import_skips_unknown_novelists(session, novelist, database_url):
+    records = [
+        {'title': 'Iracema', 'year': '1865', 'novelist': novelist.name},
+        {'title': 'O Guarani', 'year': '1857', 'novelist': 'José de Alencar'},
+    ]
+    reports = []
+
+    stats = import_catalog(
+        enumerate(records, start=1),
+        database_url,
+        batch_size=10,
+        report=reports.append,
+    )
+
+    assert stats.inserted == 1
+    assert stats.unknown_novelist == 1
+    assert len(reports) == 1
+
+    book = await session.scalar(select(Book))
+    assert (book.title, book.novelist_id) == ('iracema', novelist.id)
+
+
+def test_import_jsonl_format(session, database_url, tmp_path, capsys):
+    catalog = tmp_path / 'catalog.jsonl'
+    catalog.write_text(
+        json.dumps({'title': 'A', 'year': '1', 'novelist': 'Autor'}) + '\n',
+        encoding='utf-8',
+    )
+
+    main([str(catalog), '--create-novelists', '--database-url', database_url])
+
+    assert 'lidas=1 inseridas=1' in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_import_skips_malformed_records(
+    session, database_url, tmp_path, capsys
+):
+    catalog = tmp_path / 'catalog.jsonl'
+    catalog.write_text(
+        json.dumps({'title': 'A', 'year': '1', 'novelist': 'Autor'})
+        + '\n{"title": "B", "year"\n'
+        + '\n[1, 2]\n'
+        + json.dumps({
+            'title': 'Iracema',
+            'year': '1865',
+            'novelist': 'Jose\u0301 de Alencar',
+        })
+        + '\n',
+        encoding='utf-8',
+    )
+
+    main([
+        str(catalog),
+        '--create-novelists',
+        '--batch-size',
+        '1',
+        '--database-url',
+        database_url,
+    ])
+
+    captured = capsys.readouterr()
+    assert 'lidas=4 inseridas=2' in captured.out
+    assert 'invalidas=2' in captured.out
+    assert 'Linha 2 ignorada' in captured.err
+    assert 'Linha 4 ignorada' in captured.err
+
+    novelists = (await session.scalars(select(Novelist.name))).all()
+    assert sorted(novelists) == ['autor', 'josé de alencar']
@@ -0,0 +1,171 @@
+import gzip
+import json
+from http import HTTPStatus
+
+import anyio
+import brotli
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from madl.compression import (
+    ENCODERS,
+    CompressionMiddleware,
+    negotiate_encoding,
+)
+from tests.conftest import BookFactory
+
+BODY = 'livro ' * 1000
+PER_PAGE = 30
+
+
+def zstd_decompress(data: bytes) -> bytes:
+    # Partes com flush não gravam o tamanho total no cabeçalho do quadro
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+DECODERS = {
+    'gzip': gzip.decompress,
+    'br': brotli.decompress,
+    'zstd': zstd_decompress,
+}
+
+
+@pytest.mark.parametrize(
+    ('accept_encoding', 'expected'),
+    [
+        ('gzip, deflate, br, zstd', 'zstd'),
+        ('gzip;q=1.0, br;q=0.5', 'gzip'),
+        ('br, zstd;q=0', 'br'),
+        ('*', 'zstd'),
+        ('*;q=0, gzip', 'gzip'),
+        ('identity', None),
+        ('', None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize('encoding', list(ENCODERS))
+def test_encoders_stream_in_chunks(encoding):
+    encoder = ENCODERS[encoding]()
+
+    data = encoder.chunk(b'primeira parte ') + encoder.finish(b'e o fim')
+
+    assert DECODERS[encoding](data) == b'primeira parte e o fim'
+
+
+def make_client(thread_size=1024 * 1024):
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=100, thread_size=thread_size
+    )
+
+    @app.get('/text')
+    def text(size: int = len(BODY)):
+        return PlainTextResponse(BODY[:size])
+
+    @app.get('/stream')
+    def stream():
+        return StreamingResponse(
+            (part for part in ['livro '] * 500), media_type='text/plain'
+        )
+
+    @app.get('/image')
+    def image():
+        return PlainTextResponse(BODY, media_type='image/png')
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('encoding', list(ENCODERS))
+def test_middleware_compresses_with_negotiated_encoding(encoding):
+    response = make_client().get(
+        '/text', headers={'Accept-Encoding': encoding}
+    )
+
+    assert response.headers['content-encoding'] == encoding
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert int(response.headers['content-length']) < len(BODY)
+    assert response.text == BODY
+
+
+def test_middleware_skips_small_and_incompressible_bodies():
+    client = make_client()
+
+    response = client.get(
+        '/text', params={'size': 10}, headers={'Accept-Encoding': 'gzip'}
+    )
+    assert 'content-encoding' not in response.headers
+    assert response.headers['vary'] == 'Accept-Encoding'
+
+    response = client.get('/image', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in response.headers
+
+
+def test_middleware_compresses_streaming_responses():
+    response = make_client().get('/stream', headers={'Accept-Encoding': 'br'})
+
+    assert response.headers['content-encoding'] == 'br'
+    assert 'content-length' not in response.headers
+    assert response.text == 'livro ' * 500
+
+
+def test_middleware_compresses_large_bodies_in_thread(mocker):
+    run_sync = mocker.spy(anyio.to_thread, 'run_sync')
+
+    response = make_client(thread_size=1000).get(
+        '/text', headers={'Accept-Encoding': 'gzip'}
+    )
+
+    assert response.text == BODY
+    assert run_sync.called
+
+
+@pytest.mark.asyncio
+async def test_list_books_is_compressed(client, session, novelist):
+    session.add_all(
+        BookFactory.create_batch(PER_PAGE, novelist_id=novelist.id)
+    )
+    await session.commit()
+
+    response = client.get(
+        '/books/list',
+        params={'per_page': PER_PAGE},
+        headers={'Accept-Encoding': 'gzip'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['etag'].startswith('W/')
+    assert len(response.json()['books']) == PER_PAGE
+
+    etag = response.headers['etag']
+    response = client.get(
+        '/books/list',
+        params={'per_page': PER_PAGE},
+        headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    # O 304 traz o mesmo validador fraco do 200 comprimido
+    assert response.headers['etag'] == etag
+    assert 'Accept-Encoding' in response.headers['vary']
+
+    strong_etag = etag.removeprefix('W/')
+    response = client.get(
+        '/books/list',
+        params={'per_page': PER_PAGE},
+        headers={'Accept-Encoding': 'identity', 'If-None-Match': strong_etag},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == strong_etag
+
+
+def test_export_is_compressed(client, novelist, book):
+    response = client.get('/books/export', headers={'Accept-Encoding': 'zstd'})
+
+    assert response.headers['content-encoding'] == 'zstd'
+    assert json.loads(response.text)['title'] == book.title
@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import select
+
+from madl.counting import CountCache, count_cache, count_rows
+from madl.models import Novelist
+
+
+def test_count_cache_expires_and_evicts(mocker):
+    clock = mocker.patch('madl.counting.time.monotonic', return_value=0)
+    cache = CountCache(ttl=10, max_entries=2)
+
+    cache.set(('a',), 1)
+    cache.set(('b',), 2)
+    cache.set(('c',), 3)
+
+    assert cache.get(('a',)) is None
+    assert cache.get(('b',)) == 2  # noqa: PLR2004
+
+    clock.return_value = 11
+    assert cache.get(('c',)) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_count_reuses_total_for_same_filters(session, novelist):
+    count_cache.clear()
+    query = select(Novelist).where(Novelist.name == novelist.name)
+
+    assert await count_rows(session, query, 'cached') == (1, 'cached')
+
+    session.add(Novelist(name='outro romancista'))
+    await session.commit()
+
+    assert await count_rows(session, query, 'cached') == (1, 'cached')
+    assert await count_rows(session, select(Novelist), 'cached') == (
+        2,
+        'cached',
+    )
+
+
+@pytest.mark.asyncio
+async def test_estimate_count_without_filters(session, novelist):
+    total, kind = await count_rows(session, select(Novelist), 'estimate')
+
+    assert kind == 'estimate'
+    assert total >= 0
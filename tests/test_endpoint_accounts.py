@@ -1,5 +1,7 @@
 from http import HTTPStatus
 
+from madl.hashing import password_hasher
+
 
 def test_create_user(client):
     response = client.post(
@@ -44,6 +46,22 @@ def test_if_email_exists(client, user):
     assert response.json() == {'detail': 'Conta já consta no MADR'}
 
 
+def test_duplicated_user_is_rejected_before_hashing(client, user, mocker):
+    hash_password = mocker.spy(password_hasher, 'hash')
+
+    response = client.post(
+        'accounts/user',
+        json={
+            'username': user.username,
+            'email': 'outro@email.com',
+            'password': 'userpassword',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert not hash_password.called
+
+
 # Teste Implementado, Mas não está em uso por regra do projeto final.
 # def test_read_all_users(client):
 #     response = client.get('/accounts/list')
@@ -105,6 +123,20 @@ def test_update_user(client, user, token):
     }
 
 
+def test_update_user_with_existing_email(client, user, other_user, token):
+    response = client.put(
+        f'/accounts/user/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'adriana',
+            'email': other_user.email,
+            'password': 'adrianapassword',
+        },
+    )
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Conta já consta no MADR'}
+
+
 def test_delete_user(client, user, token):
     response = client.delete(
         f'/accounts/user/{user.id}',
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+from madl.autocomplete import PrefixIndex
+
+
+def test_prefix_index_matches_any_word_and_respects_limit():
+    index = PrefixIndex()
+    index.load([(1, 'machado de assis'), (2, 'mário de andrade')])
+
+    assert index.search('Ma', 10) == [
+        (1, 'machado de assis'),
+        (2, 'mário de andrade'),
+    ]
+    assert index.search('assis', 10) == [(1, 'machado de assis')]
+    assert index.search('de', 1) == [(2, 'mário de andrade')]
+    assert index.search('  ', 10) == []
+
+
+def test_prefix_index_add_and_remove():
+    index = PrefixIndex()
+    index.add(1, 'clarice lispector')
+    index.add(1, 'clarice')
+    index.add(2, 'cecília meireles')
+
+    assert index.search('lis', 10) == []
+    assert index.search('c', 10) == [(2, 'cecília meireles'), (1, 'clarice')]
+
+    index.remove(2)
+    assert index.search('c', 10) == [(1, 'clarice')]
+    assert len(index) == 1
+
+
+def test_prefix_index_removes_a_whole_group():
+    index = PrefixIndex()
+    index.load([
+        (1, 'iracema', 7),
+        (2, 'o guarani', 7),
+        (3, 'dom casmurro', 8),
+    ])
+    index.add(4, 'senhora', 7)
+    index.add(2, 'o guarani', 9)
+
+    index.remove_group(7)
+
+    assert [item_id for item_id, _ in index.search('o', 10)] == [2]
+    assert len(index) == 2  # noqa: PLR2004
+
+
+def test_prefix_index_normalizes_decomposed_text_and_keeps_digits():
+    index = PrefixIndex()
+    index.add(1, 'Jose\u0301 de Alencar')
+    index.add(2, '1984')
+
+    assert not index.stale
+    assert index.search('josé', 10) == [(1, 'Jose\u0301 de Alencar')]
+    assert index.search('19', 10) == [(2, '1984')]
+
+
+def test_autocomplete_follows_decomposed_book_titles(client, novelist, token):
+    client.get('/autocomplete', params={'q': 'x'})
+
+    response = client.post(
+        '/books/new',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'year': '1857',
+            'title': 'O Guarani\u0301 1',
+            'novelist_id': novelist.id,
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+    response = client.get('/autocomplete', params={'q': 'guarani 1'})
+    assert [item['kind'] for item in response.json()['suggestions']] == [
+        'book'
+    ]
+
+
+def test_autocomplete_builds_from_database(client, novelist, book):
+    response = client.get('/autocomplete', params={'q': novelist.name[:3]})
+
+    assert response.status_code == HTTPStatus.OK
+    assert {
+        'kind': 'novelist',
+        'id': novelist.id,
+        'label': novelist.name,
+    } in response.json()['suggestions']
+
+
+def test_autocomplete_follows_novelist_writes(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/autocomplete', params={'q': 'x'})
+
+    client.post(
+        '/novelists/new', headers=headers, json={'name': 'Érico Veríssimo'}
+    )
+    response = client.get(
+        '/autocomplete', params={'q': 'eri', 'kind': 'novelist'}
+    )
+    assert response.json()['suggestions'] == [
+        {'kind': 'novelist', 'id': 1, 'label': 'érico veríssimo'}
+    ]
+
+    client.patch(
+        '/novelists/1', headers=headers, json={'name': 'Rachel de Queiroz'}
+    )
+    assert client.get('/autocomplete', params={'q': 'eri'}).json() == {
+        'suggestions': []
+    }
+
+    client.delete('/novelists/1', headers=headers)
+    assert client.get('/autocomplete', params={'q': 'queiroz'}).json() == {
+        'suggestions': []
+    }
+
+
+def test_autocomplete_requires_query(client):
+    response = client.get('/autocomplete', params={'q': ''})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
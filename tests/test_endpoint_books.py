@@ -1,5 +1,15 @@
+import csv
+import io
+import json
 from http import HTTPStatus
 
+import pytest
+
+from madl.models import Book
+from madl.pagination import encode_cursor
+from madl.schemas.book_schema import BookPublicSchema
+from tests.conftest import BookFactory
+
 
 def test_deny_create_book_without_permissions(client):
     response = client.post(
@@ -78,6 +88,17 @@ def test_list_all_books_list_with_book(client, novelist, book):
     assert response_data['books'][0]['id'] == book.id
 
 
+def test_list_books_matches_public_schema(client, novelist, book):
+    response = client.get('books/list')
+
+    # As linhas montadas direto do SQL devem ser idênticas ao schema
+    assert response.json()['books'] == [
+        BookPublicSchema.model_validate(book, from_attributes=True).model_dump(
+            mode='json'
+        )
+    ]
+
+
 def test_if_book_exists(client, novelist, book, token):
     response = client.post(
         '/books/new',
@@ -159,6 +180,22 @@ def test_try_update_book_with_inexistent_novelist(
     assert response.json() == {'detail': 'Romancista não encontrado'}
 
 
+@pytest.mark.asyncio
+async def test_patch_book_with_existing_title(
+    client, session, novelist, book, token
+):
+    session.add(Book(year='1899', title='dom casmurro', novelist_id=1))
+    await session.commit()
+
+    response = client.patch(
+        f'/books/{book.id}',
+        json={'title': 'Dom Casmurro', 'novelist_id': 0},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Livro já consta no MADR'}
+
+
 def test_delete_book(client, novelist, book, token):
     response = client.delete(
         f'/books/{book.id}',
@@ -179,3 +216,266 @@ def test_delete_book_error(client, token):
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Livro não consta no MADR'}
+
+
+@pytest.mark.asyncio
+async def test_list_books_with_cursor_walks_all_pages(
+    client, session, novelist
+):
+    session.add_all(BookFactory.create_batch(5, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get('/books/list', params={'cursor': '', 'per_page': 2})
+    data = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert 'page' not in data
+    assert data['total'] == 5  # noqa: PLR2004
+    assert data['prev_cursor'] is None
+
+    ids = [book['id'] for book in data['books']]
+    while data.get('next_cursor'):
+        data = client.get(
+            '/books/list',
+            params={'cursor': data['next_cursor'], 'per_page': 2},
+        ).json()
+        ids += [book['id'] for book in data['books']]
+
+    assert ids == sorted(ids)
+    assert len(ids) == 5  # noqa: PLR2004
+
+    previous = client.get(
+        '/books/list', params={'cursor': data['prev_cursor'], 'per_page': 2}
+    ).json()
+    assert [book['id'] for book in previous['books']] == ids[2:4]
+
+
+@pytest.mark.asyncio
+async def test_list_books_with_cursor_by_title_and_filter(
+    client, session, novelist
+):
+    for title in ['c livro azul', 'a livro azul', 'b livro verde']:
+        session.add(Book(year='2000', title=title, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get(
+        '/books/list',
+        params={'cursor': '', 'order_by': 'title', 'title': 'azul'},
+    )
+    data = response.json()
+    assert [book['title'] for book in data['books']] == [
+        'a livro azul',
+        'c livro azul',
+    ]
+    assert data['next_cursor'] is None
+
+
+def test_list_books_with_invalid_cursor(client):
+    response = client.get('/books/list', params={'cursor': 'invalido'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor inválido'}
+
+
+def test_list_books_with_tampered_boolean_cursor(client, novelist, book):
+    cursor = encode_cursor('id', 'next', [True])
+
+    response = client.get('/books/list', params={'cursor': cursor})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor inválido'}
+
+
+@pytest.mark.parametrize(
+    ('url', 'params'),
+    [
+        ('/books/list', {'per_page': 0}),
+        ('/books/list', {'per_page': 101}),
+        ('/books/list', {'page': 0}),
+        ('/books/list', {'cursor': '', 'per_page': -5}),
+        ('/books/list', {'order_by': 'title', 'per_page': 0}),
+        ('/novelists/list', {'per_page': 0}),
+        ('/novelists/list', {'page': -1}),
+        ('/novelists/list', {'cursor': '', 'per_page': -5}),
+    ],
+)
+def test_list_rejects_page_out_of_bounds(client, url, params):
+    response = client.get(url, params=params)
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize('count', ['exact', 'cached', 'window'])
+def test_list_books_total_by_count_strategy(client, novelist, book, count):
+    response = client.get('/books/list', params={'count': count})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['X-Total-Kind'] == count
+    assert response.json()['total'] == 1
+
+
+def test_list_books_total_estimate(client, novelist, book):
+    response = client.get(
+        '/books/list', params={'count': 'estimate', 'title': book.title}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['X-Total-Kind'] == 'estimate'
+    assert response.json()['total'] >= 0
+
+
+def test_list_books_window_count_past_last_page(client, novelist, book):
+    response = client.get('/books/list', params={'count': 'window', 'page': 3})
+    assert response.json()['books'] == []
+    assert response.json()['total'] == 1
+
+
+def test_read_books_filter_treats_wildcards_as_text(client, novelist, book):
+    response = client.get('/books/list', params={'title': '%'})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['books'] == []
+
+
+def test_create_books_bulk_reports_each_item(client, novelist, book, token):
+    response = client.post(
+        '/books/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'year': '1899', 'title': 'Dom Casmurro', 'novelist_id': 1},
+            {'year': '1899', 'title': 'dom casmurro', 'novelist_id': 1},
+            {'year': '2000', 'title': book.title, 'novelist_id': 1},
+            {'year': '2000', 'title': 'sem autor', 'novelist_id': 99},
+        ],
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {
+        'created': 1,
+        'failed': 3,
+        'results': [
+            {'index': 0, 'status': 'created', 'id': 2},
+            {
+                'index': 1,
+                'status': 'conflict',
+                'detail': 'Livro repetido no lote',
+            },
+            {
+                'index': 2,
+                'status': 'conflict',
+                'detail': 'Livro já consta no MADR',
+            },
+            {
+                'index': 3,
+                'status': 'not_found',
+                'detail': 'Romancista não encontrado',
+            },
+        ],
+    }
+
+    response = client.get('/books/2')
+    assert response.json()['title'] == 'dom casmurro'
+
+
+def test_create_books_bulk_atomic_rejects_whole_batch(client, novelist, token):
+    response = client.post(
+        '/books/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'mode': 'atomic'},
+        json=[
+            {'year': '1899', 'title': 'dom casmurro', 'novelist_id': 1},
+            {'year': '2000', 'title': 'sem autor', 'novelist_id': 99},
+        ],
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert [item['status'] for item in response.json()['results']] == [
+        'skipped',
+        'not_found',
+    ]
+    assert client.get('/books/list').json()['total'] == 0
+
+
+def test_create_books_bulk_requires_items(client, token):
+    response = client.post(
+        '/books/bulk', headers={'Authorization': f'Bearer {token}'}, json=[]
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_export_books_as_ndjson_with_filter(client, session, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    session.add(Book(year='1881', title='o mulato', novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get('/books/export', params={'year': '1881'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['title'] for line in lines] == ['o mulato']
+    assert set(lines[0]) == set(BookPublicSchema.model_fields)
+
+
+def test_export_books_as_csv(client, novelist, book):
+    response = client.get('/books/export', params={'format': 'csv'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'books.csv' in response.headers['content-disposition']
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]['title'] == book.title
+    assert rows[0]['id'] == str(book.id)
+
+
+def test_read_book_answers_conditional_requests(client, novelist, book):
+    response = client.get(f'/books/{book.id}')
+    etag = response.headers['etag']
+    last_modified = response.headers['last-modified']
+
+    response = client.get(f'/books/{book.id}', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+    assert not response.content
+
+    response = client.get(
+        f'/books/{book.id}', headers={'If-Modified-Since': last_modified}
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(
+        f'/books/{book.id}', headers={'If-None-Match': '"outra"'}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_list_books_etag_changes_after_write(client, novelist, book, token):
+    etag = client.get('/books/list').headers['etag']
+
+    response = client.get('/books/list', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    assert (
+        client.get('/books/list', params={'page': 2}).headers['etag'] != etag
+    )
+
+    client.post(
+        '/books/new',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'year': '1899', 'title': 'dom casmurro', 'novelist_id': 1},
+    )
+
+    response = client.get('/books/list', headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['total'] == 2  # noqa: PLR2004
+
+
+def test_list_books_etag_follows_page_content(client, novelist, book, token):
+    response = client.get('/books/list', params={'count': 'estimate'})
+    etag = response.headers['etag']
+    assert 'last-modified' not in response.headers
+
+    client.delete(
+        f'/books/{book.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get(
+        '/books/list',
+        params={'count': 'estimate'},
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['books'] == []
@@ -1,5 +1,11 @@
+import json
 from http import HTTPStatus
 
+import pytest
+
+from madl.models import Novelist
+from madl.pagination import encode_cursor
+
 
 def test_deny_create_novelist_without_permissions(client):
     response = client.post(
@@ -105,6 +111,22 @@ def test_patch_novelist(client, novelist, token):
     assert response.json()['name'] == 'casemiro de abreu'
 
 
+@pytest.mark.asyncio
+async def test_patch_novelist_with_existing_name(
+    client, session, novelist, token
+):
+    session.add(Novelist(name='clarice lispector'))
+    await session.commit()
+
+    response = client.patch(
+        f'/novelists/{novelist.id}',
+        json={'name': 'Clarice Lispector'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Romancista já consta no MADR'}
+
+
 def test_delete_novelist(client, novelist, token):
     response = client.delete(
         f'/novelists/{novelist.id}',
@@ -116,9 +138,130 @@ def test_delete_novelist(client, novelist, token):
     assert response.json() == {'message': 'Romancista deletado no MADR'}
 
 
+def test_delete_novelist_removes_books(client, novelist, book, token):
+    # Leitura e sugestão em cache antes da remoção
+    assert client.get(f'/books/{book.id}').status_code == HTTPStatus.OK
+    response = client.get(
+        '/autocomplete', params={'q': book.title, 'kind': 'book'}
+    )
+    assert response.json()['suggestions']
+
+    response = client.delete(
+        f'/novelists/{novelist.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.get(f'/books/{book.id}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.get(
+        '/autocomplete', params={'q': book.title, 'kind': 'book'}
+    )
+    assert response.json() == {'suggestions': []}
+
+
 def test_delete_novelist_error(client, token):
     response = client.delete(
         '/novelists/2', headers={'Authorization': f'Bearer {token}'}
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Romancista não consta no MADR'}
+
+
+@pytest.mark.asyncio
+async def test_list_novelists_with_cursor_by_name(client, session):
+    for name in ['carlos', 'ana', 'bruno']:
+        session.add(Novelist(name=name))
+    await session.commit()
+
+    response = client.get(
+        '/novelists/list',
+        params={'cursor': '', 'order_by': 'name', 'per_page': 2},
+    )
+    data = response.json()
+    assert [novelist['name'] for novelist in data['novelists']] == [
+        'ana',
+        'bruno',
+    ]
+
+    response = client.get(
+        '/novelists/list',
+        params={
+            'cursor': data['next_cursor'],
+            'order_by': 'name',
+            'per_page': 2,
+        },
+    )
+    data = response.json()
+    assert [novelist['name'] for novelist in data['novelists']] == ['carlos']
+    assert data['next_cursor'] is None
+    assert data['prev_cursor'] is not None
+
+
+def test_list_novelists_cursor_from_other_ordering(client):
+    cursor = encode_cursor('id', 'next', [1])
+
+    response = client.get(
+        '/novelists/list', params={'cursor': cursor, 'order_by': 'name'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor inválido'}
+
+
+def test_create_novelists_bulk(client, novelist, token):
+    response = client.post(
+        '/novelists/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'name': 'Machado de Assis'},
+            {'name': novelist.name},
+            {'name': 'machado  de assis'},
+            {'name': 'Clarice Lispector'},
+        ],
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    data = response.json()
+    assert data['created'] == 2  # noqa: PLR2004
+    assert [item['status'] for item in data['results']] == [
+        'created',
+        'conflict',
+        'conflict',
+        'created',
+    ]
+
+    response = client.get('/novelists/list', params={'name': 'lispector'})
+    assert response.json()['novelists'][0]['name'] == 'clarice lispector'
+
+
+def test_create_novelists_bulk_without_permissions(client):
+    response = client.post('/novelists/bulk', json=[{'name': 'ninguém'}])
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_export_novelists(client, novelist):
+    response = client.get('/novelists/export')
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.text)['name'] == novelist.name
+
+
+def test_export_novelists_empty_csv_has_header(client):
+    response = client.get('/novelists/export', params={'format': 'csv'})
+
+    assert response.text == 'id,name,created_at,updated_at\r\n'
+
+
+def test_read_novelist_conditional_after_patch(client, novelist, token):
+    etag = client.get(f'/novelists/{novelist.id}').headers['etag']
+
+    client.patch(
+        f'/novelists/{novelist.id}',
+        json={'name': 'casemiro de abreu'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = client.get(
+        f'/novelists/{novelist.id}', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+
+from madl.models import Book, Novelist
+
+
+@pytest_asyncio.fixture
+async def catalog(session):
+    # Nome fixo, pois o nome aleatório da fábrica pode conter 'jose'
+    author = Novelist(name='bernardo guimaraes')
+    session.add(author)
+    await session.flush()
+
+    session.add_all([
+        Novelist(name='jose de alencar'),
+        Book(year='1865', title='iracema', novelist_id=author.id),
+        Book(year='1857', title='o guarani', novelist_id=author.id),
+        Book(year='1875', title='senhora de são josé', novelist_id=author.id),
+    ])
+    await session.commit()
+
+
+def test_search_matches_books_and_novelists_without_accents(client, catalog):
+    response = client.get('/search', params={'q': 'José'})
+    assert response.status_code == HTTPStatus.OK
+
+    data = response.json()
+    assert {(item['kind'], item['label']) for item in data['results']} == {
+        ('novelist', 'jose de alencar'),
+        ('book', 'senhora de são josé'),
+    }
+    assert data['next_cursor'] is None
+
+
+def test_search_filtered_by_kind(client, catalog):
+    response = client.get('/search', params={'q': 'iracema', 'kind': 'book'})
+    results = response.json()['results']
+    assert [item['label'] for item in results] == ['iracema']
+
+
+def test_search_pages_with_cursor(client, catalog):
+    response = client.get('/search', params={'q': 'jose', 'per_page': 1})
+    data = response.json()
+    assert len(data['results']) == 1
+    assert data['next_cursor']
+
+    response = client.get(
+        '/search',
+        params={'q': 'jose', 'per_page': 1, 'cursor': data['next_cursor']},
+    )
+    second = response.json()
+    assert len(second['results']) == 1
+    assert second['results'][0] != data['results'][0]
+    assert second['next_cursor'] is None
+
+
+def test_search_requires_query(client):
+    response = client.get('/search', params={'q': ''})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize('per_page', [0, -1, 101])
+def test_search_rejects_per_page_out_of_bounds(client, catalog, per_page):
+    response = client.get(
+        '/search', params={'q': 'jose', 'per_page': per_page}
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
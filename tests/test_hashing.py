@@ -0,0 +1,67 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from madl.database import settings
+from madl.hashing import PasswordHasher, password_hasher, verify_password
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_runs_in_process_pool():
+    hasher = PasswordHasher(workers=1, max_pending=4, timeout=30)
+    try:
+        hashed = await hasher.hash('segredo')
+
+        assert verify_password('segredo', hashed)
+        assert await hasher.verify('segredo', hashed) is True
+        assert await hasher.verify('errada', hashed) is False
+    finally:
+        hasher.shutdown()
+
+    stats = hasher.snapshot()
+    assert stats['completed'] == 3  # noqa: PLR2004
+    assert stats['pending'] == 0
+    assert stats['latency_max_ms'] > 0
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_sheds_load_when_queue_is_full():
+    hasher = PasswordHasher(workers=0, max_pending=1, timeout=30)
+
+    results = await asyncio.gather(
+        hasher.hash('um'), hasher.hash('dois'), return_exceptions=True
+    )
+
+    errors = [error for error in results if isinstance(error, HTTPException)]
+    assert len(errors) == 1
+    assert errors[0].status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert hasher.snapshot()['rejected'] == 1
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_times_out():
+    hasher = PasswordHasher(workers=0, max_pending=1, timeout=0)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await hasher.hash('segredo')
+
+    assert excinfo.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert hasher.snapshot()['timeouts'] == 1
+
+
+def test_login_returns_503_with_retry_after_when_overloaded(
+    client, user, monkeypatch
+):
+    monkeypatch.setattr(password_hasher, 'max_pending', 0)
+    monkeypatch.setattr(settings, 'INTERNAL_METRICS_ENABLED', True)
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['retry-after'] == '1'
+    assert client.get('/internal/hashing').json()['rejected'] >= 1
@@ -1,28 +1,33 @@
+import pytest
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from madl.database import get_session
 from madl.models import Account
 
 
-def test_create_user(session):
+@pytest.mark.asyncio
+async def test_create_user(session):
     new_user = Account(
         username='fabio', email='fabio@email.com', password='fabiopass'
     )
     session.add(new_user)
-    session.commit()
+    await session.commit()
 
-    user = session.scalar(select(Account).where(Account.username == 'fabio'))
+    user = await session.scalar(
+        select(Account).where(Account.username == 'fabio')
+    )
 
     assert user.username == 'fabio'
 
 
-def test_get_session(session, engine, mocker):
-    mocker.patch('madr.database.engine', engine)
+@pytest.mark.asyncio
+async def test_get_session(session, engine, mocker):
+    mocker.patch('madl.database.engine', engine)
 
     session_generator = get_session()
-    generated_session = next(session_generator)
+    generated_session = await anext(session_generator)
 
-    assert isinstance(generated_session, Session)
+    assert isinstance(generated_session, AsyncSession)
     assert generated_session.bind.url == engine.url
-    session_generator.close()
+    await session_generator.aclose()
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+
+from madl.rate_limit import DatabaseBackend, MemoryBackend, parse_rule
+
+
+def test_parse_rule():
+    assert parse_rule('5/60') == (5, 5 / 60)
+    assert parse_rule('') is None
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_refills_over_time(mocker):
+    clock = mocker.patch('madl.rate_limit.time.monotonic', return_value=0)
+    backend = MemoryBackend(max_keys=10)
+
+    assert await backend.consume('ip', 2, 1) == 0
+    assert await backend.consume('ip', 2, 1) == 0
+    assert await backend.consume('ip', 2, 1) == 1
+
+    clock.return_value = 1
+    assert await backend.consume('ip', 2, 1) == 0
+    assert await backend.consume('outro', 2, 1) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_idle_buckets():
+    backend = MemoryBackend(max_keys=1)
+
+    await backend.consume('a', 1, 0.001)
+    await backend.consume('b', 1, 0.001)
+
+    assert await backend.consume('a', 1, 0.001) == 0
+
+
+@pytest.mark.asyncio
+async def test_database_backend_shares_bucket(engine, session):
+    backend = DatabaseBackend(engine)
+
+    assert await backend.consume('login:ip:1', 2, 0.01) == 0
+    assert await backend.consume('login:ip:1', 2, 0.01) == 0
+    assert await backend.consume('login:ip:1', 2, 0.01) > 0
+    assert await backend.consume('login:ip:2', 2, 0.01) == 0
+
+
+def test_login_is_limited_per_account(client, user, monkeypatch):
+    monkeypatch.setattr(
+        'madl.rate_limit.settings.RATE_LIMIT_LOGIN_PER_ACCOUNT', '2/60'
+    )
+
+    for _ in range(2):
+        response = client.post(
+            '/auth/token',
+            data={'username': user.email, 'password': 'senha_errada'},
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers['retry-after'] == '30'
+
+
+def test_signup_is_limited_per_ip(client, monkeypatch):
+    monkeypatch.setattr(
+        'madl.rate_limit.settings.RATE_LIMIT_SIGNUP_PER_IP', '1/10'
+    )
+    account = {
+        'username': 'alice',
+        'email': 'alice@example.com',
+        'password': 'secret',
+    }
+
+    assert (
+        client.post('/accounts/user', json=account).status_code
+        == HTTPStatus.CREATED
+    )
+    response = client.post('/accounts/user', json=account)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_writes_are_limited_per_account(client, token, monkeypatch):
+    monkeypatch.setattr(
+        'madl.rate_limit.settings.RATE_LIMIT_WRITES_PER_ACCOUNT', '1/60'
+    )
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post(
+        '/novelists/new', headers=headers, json={'name': 'um'}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+    response = client.post(
+        '/novelists/new', headers=headers, json={'name': 'dois'}
+    )
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
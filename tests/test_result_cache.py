@@ -0,0 +1,151 @@
+import asyncio
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+
+import pytest
+
+from madl.database import settings
+from madl.result_cache import ResultCache
+
+
+def loader(value):
+    calls = []
+
+    async def load(session):
+        calls.append(session)
+        return value
+
+    return load, calls
+
+
+@asynccontextmanager
+async def refresh_session():
+    yield 'refresh'
+
+
+@pytest.mark.asyncio
+async def test_result_cache_serves_stale_and_refreshes(mocker):
+    clock = mocker.patch('madl.result_cache.time.monotonic', return_value=0)
+    cache = ResultCache(
+        ttl=10,
+        stale_ttl=10,
+        max_entries=10,
+        max_bytes=1024,
+        session_factory=refresh_session,
+    )
+    load, calls = loader({'total': 1})
+
+    assert await cache.get_or_load(('a',), {'t'}, 'request', load) == {
+        'total': 1
+    }
+    assert await cache.get_or_load(('a',), {'t'}, 'request', load) == {
+        'total': 1
+    }
+
+    clock.return_value = 15
+    await cache.get_or_load(('a',), {'t'}, 'request', load)
+    await asyncio.sleep(0)
+
+    clock.return_value = 20
+    assert cache.stats()['stale_hits'] == 1
+    assert calls == ['request', 'refresh']
+    await cache.get_or_load(('a',), {'t'}, 'request', load)
+    assert cache.stats()['hits'] == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_result_cache_adds_tags_from_loaded_value():
+    cache = ResultCache(ttl=10, stale_ttl=0, max_entries=10, max_bytes=1024)
+    load, calls = loader({'owner': 7})
+
+    await cache.get_or_load(
+        ('a',), {'t'}, None, load, lambda value: [f'owner:{value["owner"]}']
+    )
+    cache.invalidate('owner:7')
+    await cache.get_or_load(('a',), {'t'}, None, load)
+
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_result_cache_evicts_by_entries_and_bytes():
+    cache = ResultCache(ttl=10, stale_ttl=0, max_entries=2, max_bytes=20)
+
+    for key in ['a', 'b', 'c']:
+        await cache.get_or_load((key,), set(), None, loader('x')[0])
+    assert cache.stats()['entries'] == 2  # noqa: PLR2004
+
+    await cache.get_or_load(('big',), set(), None, loader('x' * 30)[0])
+    assert cache.stats()['entries'] == 2  # noqa: PLR2004
+
+    await cache.get_or_load(('d',), set(), None, loader('x' * 16)[0])
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['size_bytes'] == 18  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_result_cache_invalidates_only_tagged_entries():
+    cache = ResultCache(ttl=10, stale_ttl=0, max_entries=10, max_bytes=1024)
+    load, calls = loader(1)
+
+    await cache.get_or_load(('list',), {'books'}, None, load)
+    await cache.get_or_load(('one',), {'book:1'}, None, load)
+    cache.invalidate('books')
+    await cache.get_or_load(('list',), {'books'}, None, load)
+    await cache.get_or_load(('one',), {'book:1'}, None, load)
+
+    assert len(calls) == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_result_cache_drops_load_started_before_invalidation():
+    cache = ResultCache(ttl=10, stale_ttl=0, max_entries=10, max_bytes=1024)
+
+    async def load(session):
+        cache.invalidate('books')
+        return 'antigo'
+
+    await cache.get_or_load(('list',), {'books'}, None, load)
+
+    assert cache.stats()['entries'] == 0
+
+
+def test_read_book_is_cached_until_patched(
+    client, novelist, book, token, monkeypatch
+):
+    monkeypatch.setattr(settings, 'INTERNAL_METRICS_ENABLED', True)
+    client.get(f'/books/{book.id}')
+    client.get(f'/books/{book.id}')
+    client.get('/books/list')
+    assert client.get('/internal/cache').json() | {'size_bytes': 0} == {
+        'entries': 2,
+        'size_bytes': 0,
+        'hits': 1,
+        'stale_hits': 0,
+        'misses': 2,
+    }
+
+    client.patch(
+        f'/books/{book.id}',
+        json={'title': 'outro titulo', 'novelist_id': 0},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert client.get('/internal/cache').json()['entries'] == 0
+    response = client.get(f'/books/{book.id}')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == 'outro titulo'
+    assert client.get('/books/list').json()['books'][0]['title'] == (
+        'outro titulo'
+    )
+
+
+def test_delete_novelist_invalidates_its_books(client, novelist, book, token):
+    assert client.get(f'/books/{book.id}').status_code == HTTPStatus.OK
+
+    client.delete(
+        f'/novelists/{novelist.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert client.get(f'/books/{book.id}').status_code == HTTPStatus.NOT_FOUND
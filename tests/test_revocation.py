@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from madl.revocation import BloomFilter, TokenDenylist
+from madl.security import create_access_token, decode_token
+
+MAX_FALSE_POSITIVES = 50
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f'jti-{index}' for index in range(1000)]
+
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f'outro-{index}' in bloom for index in range(1000))
+    assert false_positives < MAX_FALSE_POSITIVES
+
+
+def test_token_carries_jti():
+    first = decode_token(create_access_token({'sub': 'a@email.com'}))
+    second = decode_token(create_access_token({'sub': 'a@email.com'}))
+
+    assert first.jti
+    assert first.jti != second.jti
+    assert first.expires_at is not None
+
+
+def test_logout_revokes_token(client, token):
+    response = client.post(
+        '/auth/logout', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'message': 'Sessão encerrada'}
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_revoke_other_token_of_same_account(client, user, token):
+    other = create_access_token({'sub': user.email}, account=user)
+
+    response = client.post(
+        '/auth/revoke',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'token': other},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {other}'}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_revoke_token_of_other_account(client, token):
+    other = create_access_token({'sub': 'outra@email.com'})
+
+    response = client.post(
+        '/auth/revoke',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'token': other},
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Token pertence a outra conta'}
+
+
+@pytest.mark.asyncio
+async def test_not_revoked_token_skips_lookup(session):
+    denylist = TokenDenylist(1000, 0.01, 60, 3600)
+    expires_at = datetime.now(tz=ZoneInfo('UTC')) + timedelta(minutes=5)
+
+    await denylist.revoke(session, 'revogado', expires_at)
+
+    assert not await denylist.is_revoked(session, 'valido')
+    assert denylist.lookups == 0
+    assert await denylist.is_revoked(session, 'revogado')
+    assert denylist.lookups == 1
+
+
+@pytest.mark.asyncio
+async def test_revocation_from_other_worker_is_synced(session, mocker):
+    clock = mocker.patch('madl.revocation.time.monotonic', return_value=0)
+    worker = TokenDenylist(1000, 0.01, 5, 3600)
+    other_worker = TokenDenylist(1000, 0.01, 5, 3600)
+    expires_at = datetime.now(tz=ZoneInfo('UTC')) + timedelta(minutes=5)
+
+    assert not await worker.is_revoked(session, 'jti')
+
+    await other_worker.revoke(session, 'jti', expires_at)
+
+    clock.return_value = 5
+    assert await worker.is_revoked(session, 'jti')
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_dropped(session):
+    denylist = TokenDenylist(1000, 0.01, 60, 3600)
+    past = datetime.now(tz=ZoneInfo('UTC')) - timedelta(minutes=5)
+
+    await denylist.revoke(session, 'vencido', past)
+
+    assert not await denylist.is_revoked(session, 'vencido')
@@ -6,14 +6,17 @@ from fastapi import HTTPException
 from freezegun import freeze_time
 from jwt import decode
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import delete, update
 
+from madl.hashing import get_password_hash, verify_password
+from madl.models import Account
+from madl.principals import principal_cache
 from madl.security import (
-    Session,
+    AsyncSession,
     create_access_token,
     get_current_user,
-    get_password_hash,
     settings,
-    verify_password,
 )
 
 
@@ -134,7 +137,7 @@ def test_token_expired_dont_refresh(client, user):
 
 
 @pytest.mark.asyncio
-async def test_missing_sub_in_token(session: Session):
+async def test_missing_sub_in_token(session: AsyncSession):
     token = jwt.encode(
         {}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )  # Token sem sub
@@ -147,7 +150,7 @@ async def test_missing_sub_in_token(session: Session):
 
 
 @pytest.mark.asyncio
-async def test_user_not_found_in_db(session: Session):
+async def test_user_not_found_in_db(session: AsyncSession):
     token = jwt.encode(
         {'sub': 'carmem'}, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -157,3 +160,100 @@ async def test_user_not_found_in_db(session: Session):
 
     assert excinfo.value.status_code == HTTPStatus.UNAUTHORIZED
     assert excinfo.value.detail == 'Could not validate credentials'
+
+
+def test_token_carries_account_id_and_version(client, user, token):
+    decoded = decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )
+
+    assert decoded['uid'] == user.id
+    assert decoded['ver'] == 0
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached_by_token(session, user):
+    principal_cache.clear()
+    token = create_access_token({'sub': user.email}, account=user)
+
+    first = await get_current_user(session=session, token=token)
+    second = await get_current_user(session=AsyncSession(), token=token)
+
+    assert second is first
+
+
+@pytest.mark.asyncio
+async def test_cached_user_follows_writes_from_other_workers(
+    session, user, other_user, monkeypatch
+):
+    principal_cache.clear()
+    monkeypatch.setattr(principal_cache, 'sync_interval', 0)
+    token = create_access_token({'sub': user.email}, account=user)
+    other_token = create_access_token(
+        {'sub': other_user.email}, account=other_user
+    )
+    await get_current_user(session=session, token=token)
+    await get_current_user(session=session, token=other_token)
+
+    # Escritas feitas por outro worker não passam pelo invalidate local
+    await session.execute(
+        update(Account)
+        .where(Account.id == user.id)
+        .values(token_version=Account.token_version + 1)
+    )
+    await session.execute(delete(Account).where(Account.id == other_user.id))
+    await session.commit()
+
+    for stale_token in [token, other_token]:
+        with pytest.raises(HTTPException):
+            await get_current_user(session=session, token=stale_token)
+
+
+def test_update_user_revokes_old_token(client, user, token):
+    response = client.put(
+        f'/accounts/user/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'adriana',
+            'email': 'adriana@email.com',
+            'password': 'adrianapassword',
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_deleted_user_token_is_rejected(client, user, token):
+    client.delete(
+        f'/accounts/user/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password(client, session, user):
+    weak = PasswordHash((
+        Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1),
+    ))
+    user.password = weak.hash(user.clean_password)
+    session.add(user)
+    await session.commit()
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    await session.refresh(user)
+    assert verify_password(user.clean_password, user.password)
+    assert not Argon2Hasher().check_needs_rehash(user.password)
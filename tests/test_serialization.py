@@ -0,0 +1,263 @@
+from http import HTTPStatus
+
+import msgpack
+import pytest
+from starlette.requests import Request
+
+from madl.schemas.book_schema import BookPublicSchema
+from madl.schemas.novelist_schema import NovelistPublicSchema
+from madl.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    negotiate_format,
+    to_columns,
+)
+from tests.conftest import BookFactory
+
+MSGPACK_ACCEPT = {'Accept': MSGPACK_MEDIA_TYPE}
+EXPANDED_BOOKS = 3
+EXPANDED_BOOKS_PAGES = 2
+
+
+def make_request(accept: str) -> Request:
+    return Request({
+        'type': 'http',
+        'headers': [(b'accept', accept.encode())],
+    })
+
+
+@pytest.mark.parametrize(
+    ('accept', 'expected'),
+    [
+        ('application/msgpack', MSGPACK_MEDIA_TYPE),
+        ('application/x-msgpack', MSGPACK_MEDIA_TYPE),
+        ('application/json, application/msgpack', JSON_MEDIA_TYPE),
+        ('application/json;q=0.5, application/msgpack', MSGPACK_MEDIA_TYPE),
+        ('application/msgpack;q=0.1, */*', JSON_MEDIA_TYPE),
+        ('text/html', JSON_MEDIA_TYPE),
+        ('', JSON_MEDIA_TYPE),
+    ],
+)
+def test_negotiate_format(accept, expected):
+    assert negotiate_format(make_request(accept)) == expected
+
+
+def test_to_columns_follows_schema_fields():
+    rows = [
+        {'id': 1, 'year': '1899', 'title': 'dom casmurro', 'novelist_id': 1},
+        {'id': 2, 'year': '1881', 'title': 'o mulato', 'novelist_id': 2},
+    ]
+
+    columns = to_columns(
+        [row | {'created_at': None, 'updated_at': None} for row in rows],
+        BookPublicSchema,
+    )
+
+    assert list(columns) == list(BookPublicSchema.model_fields)
+    assert columns['title'] == ['dom casmurro', 'o mulato']
+
+
+def test_read_book_as_msgpack(client, novelist, book):
+    json_response = client.get(f'/books/{book.id}')
+    response = client.get(f'/books/{book.id}', headers=MSGPACK_ACCEPT)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == MSGPACK_MEDIA_TYPE
+    assert 'Accept' in response.headers['vary']
+    assert msgpack.unpackb(response.content) == json_response.json()
+
+    # Cada formato tem seu próprio ETag
+    assert response.headers['etag'] != json_response.headers['etag']
+    response = client.get(
+        f'/books/{book.id}',
+        headers=MSGPACK_ACCEPT | {'If-None-Match': response.headers['etag']},
+    )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_list_books_in_columns(client, session, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+
+    rows = client.get('/books/list').json()
+    response = client.get(
+        '/books/list', params={'layout': 'columns'}, headers=MSGPACK_ACCEPT
+    )
+
+    data = msgpack.unpackb(response.content)
+    assert data['books'] == to_columns(rows['books'], BookPublicSchema)
+    assert data['total'] == rows['total']
+
+
+def test_list_novelists_in_columns(client, novelist):
+    response = client.get('/novelists/list', params={'layout': 'columns'})
+
+    assert response.json()['novelists']['name'] == [novelist.name]
+
+
+def test_autocomplete_as_msgpack_in_columns(client, novelist):
+    response = client.get(
+        '/autocomplete',
+        params={'q': novelist.name[:3], 'layout': 'columns'},
+        headers=MSGPACK_ACCEPT,
+    )
+
+    data = msgpack.unpackb(response.content)
+    assert data['suggestions']['id'] == [novelist.id]
+
+
+@pytest.mark.asyncio
+async def test_list_books_with_sparse_fields(client, session, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get(
+        '/books/list',
+        params={'fields': 'title,id', 'order_by': 'title', 'per_page': 2},
+    )
+
+    data = response.json()
+    assert all(list(book) == ['id', 'title'] for book in data['books'])
+
+    # O cursor continua usando o título mesmo fora dos campos pedidos
+    params = {'fields': 'id', 'order_by': 'title', 'per_page': 2}
+    first = client.get('/books/list', params=params | {'cursor': ''}).json()
+    second = client.get(
+        '/books/list', params=params | {'cursor': first['next_cursor']}
+    ).json()
+
+    ids = [book['id'] for book in first['books'] + second['books']]
+    assert len(set(ids)) == len(ids) == data['total']
+    assert all(list(book) == ['id'] for book in second['books'])
+
+
+def test_read_book_with_sparse_fields(client, novelist, book):
+    response = client.get(
+        f'/books/{book.id}', params={'fields': 'title'}, headers=MSGPACK_ACCEPT
+    )
+
+    assert msgpack.unpackb(response.content) == {'title': book.title}
+
+
+def test_list_novelists_with_sparse_fields_in_columns(client, novelist):
+    response = client.get(
+        '/novelists/list', params={'fields': 'name', 'layout': 'columns'}
+    )
+
+    assert response.json()['novelists'] == {'name': [novelist.name]}
+
+
+def test_unknown_fields_are_rejected(client, novelist):
+    response = client.get(
+        f'/novelists/{novelist.id}', params={'fields': 'name,senha'}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Campos inválidos: senha'}
+
+
+def test_list_books_expanding_novelist(client, novelist, book):
+    response = client.get(
+        '/books/list', params={'expand': 'novelist', 'fields': 'title'}
+    )
+
+    data = response.json()
+    assert data['total'] == 1
+    assert list(data['books'][0]) == ['title', 'novelist']
+    assert data['books'][0]['novelist']['name'] == novelist.name
+    assert set(data['books'][0]['novelist']) == set(
+        NovelistPublicSchema.model_fields
+    )
+
+
+def test_list_books_expanding_novelist_in_columns(client, novelist, book):
+    response = client.get(
+        '/books/list',
+        params={'expand': 'novelist', 'fields': 'id', 'layout': 'columns'},
+    )
+
+    data = response.json()['books']
+    assert list(data) == ['id', 'novelist']
+    assert data['id'] == [book.id]
+    assert [item['id'] for item in data['novelist']] == [novelist.id]
+
+
+def test_read_book_expanding_novelist_follows_novelist_changes(
+    client, novelist, book, token
+):
+    url = f'/books/{book.id}'
+    response = client.get(url, params={'expand': 'novelist'})
+    etag = response.headers['etag']
+
+    assert response.json()['novelist']['name'] == novelist.name
+
+    client.patch(
+        f'/novelists/{novelist.id}',
+        json={'name': 'casemiro de abreu'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = client.get(
+        url, params={'expand': 'novelist'}, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['novelist']['name'] == 'casemiro de abreu'
+
+
+@pytest.mark.asyncio
+async def test_read_novelist_expanding_books(client, session, novelist):
+    session.add_all(BookFactory.create_batch(3, novelist_id=novelist.id))
+    await session.commit()
+
+    response = client.get(
+        f'/novelists/{novelist.id}',
+        params={'expand': 'books', 'page': 2, 'per_page': 2},
+    )
+
+    data = response.json()
+    assert data['name'] == novelist.name
+    assert data['books']['total'] == EXPANDED_BOOKS
+    assert data['books']['total_pages'] == EXPANDED_BOOKS_PAGES
+    assert len(data['books']['books']) == 1
+    assert set(data['books']['books'][0]) == set(BookPublicSchema.model_fields)
+
+
+def test_read_novelist_expanding_books_without_books(client, novelist):
+    response = client.get(
+        f'/novelists/{novelist.id}', params={'expand': 'books'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['books']['books'] == []
+    assert response.json()['books']['total'] == 0
+
+
+def test_read_novelist_expanding_books_etag_follows_deletes(
+    client, novelist, book, token
+):
+    url = f'/novelists/{novelist.id}'
+    response = client.get(url, params={'expand': 'books'})
+    etag = response.headers['etag']
+
+    client.delete(
+        f'/books/{book.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get(
+        url, params={'expand': 'books'}, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['books']['total'] == 0
+
+
+@pytest.mark.parametrize(
+    'params', [{'per_page': 0}, {'per_page': 101}, {'page': 0}]
+)
+def test_read_novelist_expanding_books_rejects_page_out_of_bounds(
+    client, novelist, params
+):
+    response = client.get(
+        f'/novelists/{novelist.id}', params={'expand': 'books'} | params
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY